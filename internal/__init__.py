@@ -1,2 +1,10 @@
 from .modularizer import Modularizer
 from .compiler import Compiler
+from .cache import ModuleCache
+from .cache import MemoryCacheBackend
+from .entity import Job
+from .shard import ShardPartitioner
+from .api import InMemoryModularizer
+from .api import ModularizationResult
+from .entity import Artifact
+from .entity import Module
@@ -0,0 +1,265 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import re
+import zipfile
+
+from .planner import DependencyPlanner
+
+# Entradas de las versiones específicas de un JAR multi-release: META-INF/versions/<versión>/<ruta en la versión base>
+VERSIONED_ENTRY_PATTERN = re.compile(r"^META-INF/versions/(\d+)/(.+)$")
+
+# Palabras reservadas de Java, las cuales no pueden formar parte del nombre de un paquete
+JAVA_RESERVED_WORDS = frozenset([
+    "abstract", "assert", "boolean", "break", "byte", "case", "catch", "char", "class", "const", "continue",
+    "default", "do", "double", "else", "enum", "extends", "false", "final", "finally", "float", "for", "goto", "if",
+    "implements", "import", "instanceof", "int", "interface", "long", "native", "new", "null", "package", "private",
+    "protected", "public", "return", "short", "static", "strictfp", "super", "switch", "synchronized", "this",
+    "throw", "throws", "transient", "true", "try", "void", "volatile", "while", "_"
+])
+
+
+class PreflightAnalyzer:
+    """
+    Analiza, antes de extraer y compilar cualquier JAR, los paquetes contenidos en cada uno de los artefactos a
+    modularizar para detectar aquellos problemas que harían fallar a javac (o a la JVM en tiempo de arranque).
+
+    Los problemas detectados son:
+        - Paquetes divididos (split packages): un mismo paquete contenido en más de un artefacto.
+        - Paquetes exportados (exportsPackages) que no existen en el JAR.
+        - JARs que ya contienen la definición de un módulo.
+        - Dependencias cíclicas entre módulos.
+    """
+
+    def __init__(self):
+        self.__artifacts = []
+        self.__packages_by_artifact = {}
+        self.__artifacts_by_package = {}
+        self.__problems = {}
+        self.__notes = {}
+
+    @classmethod
+    def index_packages(cls, jar_file: zipfile.ZipFile):
+        """
+        Obtiene todos los paquetes del JAR que contengan al menos un archivo .class. Solo se lee el directorio central
+        del archivo, nunca el contenido de las entradas.
+
+        Solo se tienen en cuenta los archivos .class que pueden formar parte de un paquete del módulo:
+            - Los de las versiones específicas de los JARs multi-release (META-INF/versions/N/) pertenecen al mismo
+              paquete que en la versión base. Los paquetes que solo existen en alguna versión específica no pueden ser
+              exportados, ya que javac solo ve la versión base.
+            - El resto de las entradas de META-INF/ son recursos, nunca paquetes.
+            - Las clases de directorios que no son nombres de paquete válidos (ej. 'WEB-INF/classes') no pertenecen a
+              ningún paquete del módulo.
+            - Las clases del paquete sin nombre (en la raíz del JAR) no están permitidas en ningún módulo, ni siquiera
+              en uno automático, por lo que el JAR no puede ser modularizado.
+
+        :param jar_file: Archivo JAR abierto para lectura.
+        :return: Tupla (set con los nombres de los paquetes, lista de notas sobre las clases ignoradas, lista de
+                 problemas que impiden modularizar el JAR).
+        """
+        non_empty_packages = set()
+        versioned_packages = {}
+        invalid_dirs = set()
+        count_unnamed_classes = 0
+
+        for info in jar_file.infolist():
+            entry_path = info.filename
+            if info.is_dir() or not entry_path.endswith(".class"):
+                continue
+
+            version = None
+            if entry_path.startswith("META-INF/"):
+                match = VERSIONED_ENTRY_PATTERN.match(entry_path)
+                if match is None:
+                    continue
+                version, entry_path = int(match.group(1)), match.group(2)
+
+            last_slash_index = entry_path.rfind('/')
+            if last_slash_index < 0:
+                # El descriptor de módulo de una versión específica no es una clase del paquete sin nombre
+                if entry_path != "module-info.class":
+                    count_unnamed_classes += 1
+                continue
+
+            package = entry_path[0:last_slash_index].replace("/", ".")
+            if not cls.is_valid_package_name(package):
+                invalid_dirs.add(entry_path[0:last_slash_index])
+            elif version is None:
+                non_empty_packages.add(package)
+            else:
+                versioned_packages.setdefault(package, set()).add(version)
+
+        notes = []
+        for package in sorted(set(versioned_packages) - non_empty_packages):
+            versions = ", ".join([str(v) for v in sorted(versioned_packages[package])])
+            notes.append("Package '" + package + "' only exists in META-INF/versions/{" + versions + "} and will not "
+                         "be exported")
+
+        for directory in sorted(invalid_dirs):
+            notes.append("Class files in '" + directory + "' are not in a valid package and will not be exported")
+
+        problems = []
+        if count_unnamed_classes > 0:
+            problems.append(str(count_unnamed_classes) + " class file(s) in the unnamed package (JAR root) are not "
+                            "allowed in a module")
+
+        return non_empty_packages, notes, problems
+
+    @classmethod
+    def is_valid_package_name(cls, package):
+        """
+        :return: True si 'package' es un nombre de paquete válido en Java (identificadores separados por '.' que no son
+                 palabras reservadas), False en caso contrario.
+        """
+        for identifier in package.split("."):
+            # '$' es válido en los identificadores de Java pero no en los de Python
+            if not identifier.replace("$", "_").isidentifier() or identifier in JAVA_RESERVED_WORDS:
+                return False
+
+        return True
+
+    def add_artifact(self, artifact, packages, notes=None, problems=None):
+        """
+        Agrega al índice global paquete->artefacto los paquetes del artefacto 'artifact'.
+
+        :param artifact: Artefacto definido en el descriptor de modularización.
+        :param packages: Set con los paquetes no vacíos del JAR correspondiente al artefacto.
+        :param notes: Notas sobre las clases del JAR que no forman parte de ningún paquete (ver index_packages()). Se
+                      reportan como advertencias al analizar.
+        :param problems: Problemas encontrados al indexar el JAR que impiden modularizarlo (ver index_packages()).
+        """
+        self.__artifacts.append(artifact)
+        if notes:
+            self.__notes[artifact.get_name()] = notes
+        for problem in problems or []:
+            self.add_problem(artifact, problem)
+        self.__packages_by_artifact[artifact.get_name()] = packages
+        for package in packages:
+            self.__artifacts_by_package.setdefault(package, []).append(artifact)
+
+    def add_problem(self, artifact, problem):
+        """
+        Marca el artefacto 'artifact' como condenado a fallar por el motivo 'problem'.
+        """
+        self.__problems.setdefault(artifact.get_name(), []).append(problem)
+
+    def get_packages(self, artifact):
+        """
+        :return: Set con los paquetes no vacíos del artefacto o None si este no fue indexado.
+        """
+        return self.__packages_by_artifact.get(artifact.get_name())
+
+    def __get_exported_packages(self, artifact):
+        """
+        :return: Paquetes exportados por el módulo del artefacto: los declarados en 'exportsPackages' (que existan en el
+                 JAR) o, por defecto y en los módulos automáticos, todos sus paquetes no vacíos.
+        """
+        packages = self.get_packages(artifact)
+        exports_packages = artifact.get_module().get_exports_packages()
+        if exports_packages is None or artifact.get_module().is_automatic():
+            return packages
+
+        return packages & set(exports_packages)
+
+    def get_split_packages(self):
+        """
+        :return: Diccionario paquete->lista de artefactos para todos aquellos paquetes contenidos en más de un artefacto.
+        """
+        return {p: a for p, a in self.__artifacts_by_package.items() if len(a) > 1}
+
+    def get_problems(self, artifact):
+        """
+        :return: Lista de problemas que impedirán modularizar el artefacto o None si no se encontró ninguno.
+        """
+        return self.__problems.get(artifact.get_name())
+
+    def analyze(self):
+        """
+        Analiza todos los artefactos indexados. Los problemas encontrados quedan registrados y pueden consultarse
+        utilizando get_problems().
+
+        Un paquete dividido solo condena a fallar la compilación del descriptor de un módulo cuando este lee el mismo
+        paquete de más de un módulo: el propio módulo y uno de los que requiere ('requiresModules'), o dos de los
+        módulos que requiere que lo exportan. En cualquier otro caso solo se advierte, pues el error se producirá al
+        arrancar la aplicación si ambos módulos son cargados en la misma capa.
+
+        :return: Lista de advertencias (problemas que no impiden la modularización).
+        """
+        warnings = []
+
+        for artifact in self.__artifacts:
+            for note in self.__notes.get(artifact.get_name(), []):
+                warnings.append("'" + artifact.get_name() + "': " + note)
+
+        # Validar que los paquetes a exportar existan en el JAR. Los módulos automáticos exportan todos sus paquetes
+        for artifact in self.__artifacts:
+            exports_packages = artifact.get_module().get_exports_packages()
+            if exports_packages is not None and not artifact.get_module().is_automatic():
+                packages = self.get_packages(artifact)
+                for package in exports_packages:
+                    if package not in packages:
+                        self.add_problem(artifact, "Exported package '" + package + "' is empty or does not exist")
+
+        # Ninguno de los módulos de un ciclo puede ser compilado
+        cycles = DependencyPlanner.find_cycles(self.__artifacts)
+        for artifact in self.__artifacts:
+            cycle = cycles.get(artifact.get_name())
+            if cycle is not None:
+                self.add_problem(artifact, "Cyclic module dependence: " + " -> ".join(cycle))
+
+        for package, artifacts in sorted(self.get_split_packages().items()):
+            description = ", ".join(["'" + a.get_name() + "' (" + a.get_module().get_name() + ")" for a in artifacts])
+            warnings.append("Split package '" + package + "' found in: " + description)
+
+        # Un módulo no puede leer el mismo paquete de dos módulos distintos (incluido él mismo): javac falla con
+        # 'module A reads package p from both B and C'. Los módulos automáticos no leen ningún módulo de forma explícita
+        module_index = {}
+        for artifact in self.__artifacts:
+            module_index.setdefault(artifact.get_module().get_name(), artifact)
+
+        for artifact in self.__artifacts:
+            module = artifact.get_module()
+            if module.is_automatic():
+                continue
+
+            # Paquete->módulos de los que lo lee el módulo del artefacto
+            readers = {p: [module.get_name()] for p in self.get_packages(artifact)}
+            for module_name in sorted(set(module.get_requires_modules() or [])):
+                required_artifact = module_index.get(module_name)
+                if module_name != module.get_name() and required_artifact is not None:
+                    for package in self.__get_exported_packages(required_artifact):
+                        readers.setdefault(package, []).append(module_name)
+
+            for package, module_names in sorted(readers.items()):
+                if len(module_names) < 2:
+                    continue
+
+                if module_names[0] == module.get_name():
+                    self.add_problem(artifact, "Package '" + package + "' exists in required module '" +
+                                     module_names[1] + "'")
+                else:
+                    self.add_problem(artifact, "Package '" + package + "' is read from required modules " +
+                                     ", ".join(["'" + m + "'" for m in module_names]))
+
+        return warnings
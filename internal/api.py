@@ -0,0 +1,339 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from .analyzer import PreflightAnalyzer
+from .cache import ModuleCache
+from .compiler import Compiler
+from .entity import Artifact
+from .jar import JarPatcher
+from .modularizer import Modularizer
+from .planner import DependencyPlanner
+from pathlib import Path
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+
+class ModularizationResult:
+    """
+    Resultado de la modularización de un artefacto utilizando InMemoryModularizer.
+    """
+
+    def __init__(self, artifact):
+        self.__artifact = artifact
+        self.__module_descriptor_source = None
+        self.__module_info = None
+        self.__output = None
+        self.__cached = False
+        self.__skipped_because = None
+        self.__timings = {}
+        self.__errors = []
+        self.__warnings = []
+
+    def get_artifact(self):
+        return self.__artifact
+
+    def get_module_descriptor_source(self):
+        """
+        :return: Contenido del archivo module-info.java generado o None si no fue generado (por ejemplo, para los
+                 módulos automáticos).
+        """
+        return self.__module_descriptor_source
+
+    def set_module_descriptor_source(self, module_descriptor_source):
+        self.__module_descriptor_source = module_descriptor_source
+
+    def get_module_info(self):
+        """
+        :return: Contenido del archivo module-info.class compilado o None si no fue compilado.
+        """
+        return self.__module_info
+
+    def set_module_info(self, module_info):
+        self.__module_info = module_info
+
+    def get_output(self):
+        """
+        :return: Ruta al JAR modularizado si se especificó un directorio de salida, un io.BytesIO (posicionado al
+                 inicio) con su contenido en caso contrario, o None si el artefacto no fue modularizado.
+        """
+        return self.__output
+
+    def set_output(self, output):
+        self.__output = output
+
+    def is_cached(self):
+        """
+        :return: True si el descriptor del módulo compilado fue tomado de la caché.
+        """
+        return self.__cached
+
+    def set_cached(self, cached):
+        self.__cached = cached
+
+    def get_skipped_because(self):
+        """
+        :return: Nombre del artefacto cuyo fallo provocó que este no fuera procesado o None si fue procesado.
+        """
+        return self.__skipped_because
+
+    def set_skipped_because(self, artifact_name):
+        self.__skipped_because = artifact_name
+
+    def get_timings(self):
+        """
+        :return: Diccionario fase->duración en segundos. Las fases son 'read', 'render', 'cache', 'extract', 'compile'
+                 y 'patch', aunque solo están presentes aquellas por las que pasó el artefacto.
+        """
+        return self.__timings
+
+    def get_errors(self):
+        """
+        :return: Lista de errores ocurridos durante la modularización del artefacto.
+        """
+        return self.__errors
+
+    def add_error(self, error):
+        self.__errors.append(error)
+
+    def get_warnings(self):
+        """
+        :return: Lista de advertencias ocurridas durante la modularización del artefacto. No impiden que sea
+                 modularizado.
+        """
+        return self.__warnings
+
+    def add_warning(self, warning):
+        self.__warnings.append(warning)
+
+    def is_successful(self):
+        return self.__output is not None and len(self.__errors) == 0
+
+
+class InMemoryModularizer:
+    """
+    API para modularizar JARs desde otro programa (por ejemplo, un plugin de construcción o un demonio de larga
+    duración) sin descriptor de modularización, sin directorios de origen y sin tener que interpretar la salida de
+    jarmod.py.
+
+    Los JARs pueden recibirse como rutas, objetos de archivo binarios o su contenido (bytes) y los JARs modularizados
+    pueden devolverse en memoria. Como javac solo trabaja con archivos, para compilar los descriptores de los módulos se
+    utiliza un directorio temporal propio que se elimina al terminar.
+
+    Una misma instancia puede utilizarse para varias modularizaciones, compartiendo el compilador y la caché.
+    """
+
+    def __init__(self, compiler: Compiler = None, module_path=None, cache: ModuleCache = None, keep_going=False,
+                 reproducible=False):
+        """
+        :param compiler: Compilador a utilizar. Por defecto se utiliza el JDK de la variable de entorno JAVA_HOME.
+        :param module_path: Directorios y/o archivos que contienen los módulos de los que dependen los JARs (misma
+                            sintaxis del parámetro --module-path de javac).
+        :param cache: Caché de descriptores de módulos compilados.
+        :param keep_going: Si es True se intenta modularizar los artefactos que dependen de otros que no pudieron ser
+                           modularizados. Por defecto se omiten.
+        :param reproducible: Si es True los JARs modularizados son idénticos byte a byte entre ejecuciones (ver
+                             JarPatcher.get_reproducible_date_time()).
+        """
+        self.__compiler = compiler if compiler is not None else Compiler()
+        self.__module_path = module_path
+        self.__cache = cache
+        self.__keep_going = keep_going
+        self.__reproducible = reproducible
+        self.__warnings = []
+
+    def get_warnings(self):
+        """
+        :return: Advertencias de la última modularización (por ejemplo, paquetes divididos entre varios artefactos).
+        """
+        return self.__warnings
+
+    def modularize(self, jars, artifacts, output_dir: Path = None):
+        """
+        Modulariza los JARs 'jars' de acuerdo con las definiciones de módulos 'artifacts'.
+
+        :param jars: Diccionario nombre de artefacto->JAR. Cada JAR puede ser una ruta (Path o str), un objeto de archivo
+                     binario o su contenido (bytes).
+        :param artifacts: Definiciones de los artefactos. Pueden ser objetos Artifact o diccionarios con el mismo formato
+                          de las entradas del descriptor de modularización.
+        :param output_dir: Directorio donde se depositarán los JARs modularizados (con el nombre <artefacto>-mod.jar).
+                           Si es None los JARs modularizados se devuelven en memoria.
+
+        :return: Lista de ModularizationResult, en el orden en que fueron modularizados, para todos los artefactos que
+                 tienen un JAR en 'jars'.
+        """
+        artifacts = set([a if isinstance(a, Artifact) else Artifact.from_json(a) for a in artifacts])
+        artifact_list = DependencyPlanner.sort(artifacts)[0]
+
+        self.__warnings = []
+        analyzer = PreflightAnalyzer()
+        results = []
+        sources = {}
+
+        # Leer todos los JARs y analizar sus paquetes antes de compilar cualquiera de ellos
+        for artifact in [a for a in artifact_list if a.get_name() in jars]:
+            result = ModularizationResult(artifact)
+            results.append(result)
+
+            with self.__measure(result, "read"):
+                try:
+                    source = self.__read_jar(jars[artifact.get_name()])
+                    with JarPatcher.open_jar(source) as jar_file:
+                        if len([m for m in jar_file.namelist() if m.endswith("module-info.class")]) > 0:
+                            analyzer.add_problem(artifact, "JAR file contains al least one module definition.")
+
+                        analyzer.add_artifact(artifact, *PreflightAnalyzer.index_packages(jar_file))
+
+                    sources[artifact.get_name()] = source
+                except Exception as e:
+                    analyzer.add_problem(artifact, "Error reading JAR file. " + str(e))
+
+        self.__warnings = analyzer.analyze()
+
+        with tempfile.TemporaryDirectory(prefix="jarmod-") as work_dir:
+            work_dir = Path(work_dir)
+
+            # Los módulos ya modularizados deben ser visibles para javac al compilar los que dependen de ellos
+            modules_dir = Path(output_dir) if output_dir is not None else work_dir / "mods"
+            modules_dir.mkdir(parents=True, exist_ok=True)
+
+            failed_modules = {}
+            for result in results:
+                artifact = result.get_artifact()
+                module = artifact.get_module()
+
+                failure_cause = None
+                if not self.__keep_going and analyzer.get_problems(artifact) is None:
+                    failure_cause = next((failed_modules[m] for m in module.get_requires_modules() or []
+                                          if m in failed_modules), None)
+
+                if failure_cause is not None:
+                    result.set_skipped_because(failure_cause)
+                elif analyzer.get_problems(artifact) is not None:
+                    for problem in analyzer.get_problems(artifact):
+                        result.add_error(problem)
+                else:
+                    self.__modularize_jar(result, sources[artifact.get_name()], analyzer.get_packages(artifact),
+                                          work_dir, modules_dir, output_dir)
+
+                if not result.is_successful():
+                    failed_modules.setdefault(module.get_name(),
+                                              failure_cause if failure_cause is not None else artifact.get_name())
+
+        return results
+
+    def __modularize_jar(self, result, source, non_empty_packages, work_dir, modules_dir, output_dir):
+        artifact = result.get_artifact()
+        module = artifact.get_module()
+        mod_jar_name = artifact.get_name() + "-mod.jar"
+        target = Path(output_dir) / mod_jar_name if output_dir is not None else io.BytesIO()
+
+        try:
+            if module.is_automatic():
+                with self.__measure(result, "patch"):
+                    JarPatcher.add_automatic_module_name(source, target, module.get_name(), self.__reproducible)
+            else:
+                with self.__measure(result, "render"):
+                    module_descriptor_source = Modularizer.build_module_descriptor_source(module, non_empty_packages)
+                    result.set_module_descriptor_source(module_descriptor_source)
+
+                cache_key = None
+                module_info_data = None
+                if self.__cache is not None:
+                    with self.__measure(result, "cache"):
+                        cache_key = ModuleCache.compute_key(source, module_descriptor_source,
+                                                            self.__compiler.get_jdk_fingerprint())
+                        module_info_data = self.__cache.get(cache_key)
+                        result.set_cached(module_info_data is not None)
+
+                if module_info_data is None:
+                    module_info_data = self.__compile(result, source, module_descriptor_source, work_dir,
+                                                      modules_dir)
+                    if self.__cache is not None:
+                        self.__cache.put(cache_key, module_info_data)
+
+                result.set_module_info(module_info_data)
+
+                with self.__measure(result, "patch"):
+                    JarPatcher.add_module_descriptor(source, target, module_info_data, self.__reproducible)
+
+            if output_dir is None:
+                target.seek(0)
+                (modules_dir / mod_jar_name).write_bytes(target.getvalue())
+
+            result.set_output(target)
+        except Exception as e:
+            result.add_error(str(e))
+
+    def __compile(self, result, source, module_descriptor_source, work_dir, modules_dir):
+        """
+        Extrae el JAR y compila el descriptor de su módulo.
+
+        :return: Contenido del archivo module-info.class.
+        """
+        temp_artifact_dir = work_dir / (result.get_artifact().get_name() + "-temp")
+        temp_artifact_dir.mkdir(parents=True, exist_ok=True)
+
+        try:
+            with self.__measure(result, "extract"):
+                with JarPatcher.open_jar(source) as jar_file:
+                    for path_err in JarPatcher.extract(jar_file, temp_artifact_dir):
+                        result.add_warning("Was not possible to extract the JAR's entry with de following path: " +
+                                           path_err)
+
+            with self.__measure(result, "compile"):
+                (temp_artifact_dir / "module-info.java").write_text(module_descriptor_source)
+                errors = self.__compiler.compile_module_descriptor(temp_artifact_dir, str(modules_dir) + (
+                    os.pathsep + self.__module_path if self.__module_path is not None else ""))
+                if errors is not None:
+                    raise RuntimeError(errors)
+
+                return (temp_artifact_dir / "module-info.class").read_bytes()
+        finally:
+            shutil.rmtree(temp_artifact_dir, ignore_errors=True)
+
+    @classmethod
+    def __read_jar(cls, jar):
+        """
+        :return: Ruta al JAR (Path) o su contenido (bytes).
+        """
+        if isinstance(jar, (str, Path)):
+            return Path(jar)
+
+        if isinstance(jar, (bytes, bytearray, memoryview)):
+            return bytes(jar)
+
+        return jar.read()
+
+    @classmethod
+    @contextlib.contextmanager
+    def __measure(cls, result, phase):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings = result.get_timings()
+            timings[phase] = timings.get(phase, 0) + time.perf_counter() - start_time
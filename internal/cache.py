@@ -0,0 +1,256 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from pathlib import Path
+import hashlib
+import os
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+
+# Versión del formato de las llaves. Debe cambiarse si cambia la forma en que se calculan para invalidar las entradas
+# existentes en las cachés compartidas
+KEY_FORMAT_VERSION = "1"
+
+
+class MemoryCacheBackend:
+    """
+    Almacena las entradas de la caché en memoria. Permite reutilizar los descriptores compilados entre los distintos
+    trabajos de un mismo proceso (por ejemplo, en el procesamiento por lotes) sin escribir nada en el disco duro.
+    """
+
+    def __init__(self):
+        self.__entries = {}
+
+    def get(self, key):
+        return self.__entries.get(key)
+
+    def put(self, key, data):
+        self.__entries[key] = data
+
+    def __str__(self):
+        return "memory"
+
+
+class DirectoryCacheBackend:
+    """
+    Almacena las entradas de la caché como archivos dentro de un directorio. Sirve tanto para la caché local como para
+    una caché compartida por el equipo montada en un directorio de red (NFS, SMB, etc.).
+    """
+
+    def __init__(self, directory: Path):
+        self.__directory = Path(directory)
+
+    def __get_entry_path(self, key):
+        # Se utilizan los dos primeros caracteres de la llave como subdirectorio para no tener miles de archivos en el
+        # mismo directorio
+        return self.__directory / key[0:2] / key
+
+    def get(self, key):
+        entry_path = self.__get_entry_path(key)
+        if not entry_path.is_file():
+            return None
+
+        return entry_path.read_bytes()
+
+    def put(self, key, data):
+        entry_path = self.__get_entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Se escribe primero en un archivo temporal y luego se renombra para que otros procesos (u otras máquinas)
+        # nunca lean una entrada escrita a medias
+        fd, temp_path = tempfile.mkstemp(dir=str(entry_path.parent), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            # mkstemp() crea el archivo con permisos solo para el usuario actual y la caché puede ser compartida
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, str(entry_path))
+        except:
+            os.unlink(temp_path)
+            raise
+
+    def __str__(self):
+        return str(self.__directory)
+
+
+class HttpCacheBackend:
+    """
+    Almacena las entradas de la caché en un servidor HTTP simple. Las entradas se leen con GET <url>/<llave> y se
+    escriben con PUT <url>/<llave>. Una respuesta 404 se interpreta como que la entrada no existe.
+    """
+
+    def __init__(self, base_url, timeout):
+        self.__base_url = base_url.rstrip("/")
+        self.__timeout = timeout
+
+    def get(self, key):
+        try:
+            with urllib.request.urlopen(self.__base_url + "/" + key, timeout=self.__timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def put(self, key, data):
+        request = urllib.request.Request(self.__base_url + "/" + key, data=data, method="PUT",
+                                         headers={"Content-Type": "application/octet-stream"})
+        with urllib.request.urlopen(request, timeout=self.__timeout):
+            pass
+
+    def __str__(self):
+        return self.__base_url
+
+
+class ModuleCache:
+    """
+    Caché de descriptores de módulos compilados (contenido del archivo module-info.class) direccionada por contenido.
+
+    La llave de cada entrada se calcula a partir del contenido del JAR original, del código fuente del descriptor del
+    módulo (module-info.java) y de la huella del JDK utilizado para compilarlo, por lo que dos máquinas que modularicen
+    el mismo JAR con la misma definición y el mismo JDK obtendrán la misma llave.
+
+    Se compone de un backend local opcional y un backend remoto (compartido) opcional. Las lecturas consultan primero
+    el backend local y luego el remoto; las escrituras se hacen en ambos. Si el backend remoto falla (tiempo de espera
+    agotado, servidor caído, etc.) se deshabilita para el resto del proceso y se continúa compilando localmente.
+    """
+
+    def __init__(self, local_backend=None, remote_backend=None):
+        self.__local_backend = local_backend
+        self.__remote_backend = remote_backend
+        self.__count_hits = 0
+        self.__count_misses = 0
+
+        # La caché puede ser utilizada desde varios hilos
+        self.__lock = threading.Lock()
+        self.__key_locks = {}
+
+    @classmethod
+    def create_backend(cls, location, timeout):
+        """
+        Crea el backend correspondiente a 'location'. Las URLs http:// y https:// se corresponden con un servidor HTTP y
+        cualquier otro valor se toma como la ruta a un directorio.
+        """
+        if location.startswith("http://") or location.startswith("https://"):
+            return HttpCacheBackend(location, timeout)
+
+        return DirectoryCacheBackend(Path(location))
+
+    @classmethod
+    def compute_key(cls, jar, module_descriptor_source, jdk_fingerprint):
+        """
+        Calcula la llave de la entrada correspondiente al descriptor del módulo de un JAR.
+
+        :param jar: Ruta al archivo JAR original o su contenido (bytes).
+        :param module_descriptor_source: Código fuente del descriptor del módulo (module-info.java).
+        :param jdk_fingerprint: Huella del JDK utilizado para compilar el descriptor.
+        :return: Llave en formato hexadecimal.
+        """
+        digest = hashlib.sha256()
+        digest.update(("jarmod-" + KEY_FORMAT_VERSION + "\0" + jdk_fingerprint + "\0").encode())
+        # Los saltos de línea dependen del sistema operativo y no deben influir en la llave
+        digest.update(module_descriptor_source.replace("\r\n", "\n").encode())
+        digest.update(b"\0")
+        if isinstance(jar, (str, Path)):
+            with open(jar, "rb") as jar_file:
+                for chunk in iter(lambda: jar_file.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        else:
+            digest.update(jar)
+
+        return digest.hexdigest()
+
+    def get_count_hits(self):
+        return self.__count_hits
+
+    def get_count_misses(self):
+        return self.__count_misses
+
+    def get_key_lock(self, key):
+        """
+        :return: Lock asociado a la llave 'key'. Permite que un solo hilo compile el descriptor de un módulo mientras
+                 los demás que necesitan el mismo esperan a que lo guarde en la caché.
+        """
+        with self.__lock:
+            return self.__key_locks.setdefault(key, threading.Lock())
+
+    def get(self, key):
+        """
+        :return: Contenido del archivo module-info.class correspondiente a la llave 'key' o None si no se encuentra en
+                 la caché.
+        """
+        data = None
+        if self.__local_backend is not None:
+            try:
+                data = self.__local_backend.get(key)
+            except Exception as e:
+                print("[WARN] Error reading from local cache '" + str(self.__local_backend) + "'. " + str(e))
+
+        remote_backend = self.__remote_backend
+        if data is None and remote_backend is not None:
+            try:
+                data = remote_backend.get(key)
+            except Exception as e:
+                self.__disable_remote_backend(remote_backend, e)
+
+            # Guardar localmente lo obtenido de la caché remota para no volver a pedirlo
+            if data is not None and self.__local_backend is not None:
+                self.__put_local(key, data)
+
+        with self.__lock:
+            if data is None:
+                self.__count_misses += 1
+            else:
+                self.__count_hits += 1
+
+        return data
+
+    def put(self, key, data):
+        """
+        Guarda en la caché el contenido 'data' del archivo module-info.class correspondiente a la llave 'key'.
+        """
+        if self.__local_backend is not None:
+            self.__put_local(key, data)
+
+        remote_backend = self.__remote_backend
+        if remote_backend is not None:
+            try:
+                remote_backend.put(key, data)
+            except Exception as e:
+                self.__disable_remote_backend(remote_backend, e)
+
+    def __put_local(self, key, data):
+        try:
+            self.__local_backend.put(key, data)
+        except Exception as e:
+            print("[WARN] Error writing to local cache '" + str(self.__local_backend) + "'. " + str(e))
+
+    def __disable_remote_backend(self, remote_backend, error):
+        with self.__lock:
+            # Otro hilo pudo haberla deshabilitado ya
+            if self.__remote_backend is remote_backend:
+                print("[WARN] Remote cache '" + str(remote_backend) + "' is not available and will not be used. " +
+                      str(error))
+                self.__remote_backend = None
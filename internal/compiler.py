@@ -21,18 +21,47 @@
 # SOFTWARE.
 
 from pathlib import Path
+import hashlib
+import json
 import os
 import subprocess
+import tempfile
+import threading
+import time
 
 javac = "javac"
 if os.name == "nt":
     javac = "javac.exe"
 
+# Opciones de la JVM de javac del perfil de arranque rápido. La compilación de un module-info.java es trivial, por lo
+# que casi todo el tiempo se va en arrancar la JVM y cargar las clases de javac: solo se utiliza el compilador JIT C1,
+# el recolector de basura más simple y un heap inicial pequeño
+STARTUP_PROFILE_JVM_OPTIONS = ["-J-XX:TieredStopAtLevel=1", "-J-XX:+UseSerialGC", "-J-Xms16m", "-J-Xshare:auto"]
+
+# Versión mínima del JDK que permite crear archivos CDS dinámicos (-XX:ArchiveClassesAtExit)
+DYNAMIC_CDS_MIN_JDK_VERSION = 13
+
+# Subdirectorio, dentro del directorio del perfil, donde se guardan los archivos de clases compartidas
+CDS_DIR_NAME = "cds"
+
+# Cantidad de ejecuciones de javac sin opciones de la JVM con que se mide el tiempo base. La primera se descarta, ya que
+# incluye la carga en memoria de los archivos del JDK
+BASELINE_RUNS = 4
+
 
 class Compiler:
     def __init__(self):
         self.__jdk_home = Path(os.environ.get("JAVA_HOME")) if os.environ.get("JAVA_HOME") is not None else None
         self.__jdk_bin_dir = None
+        self.__jdk_fingerprint = None
+        self.__profile_dir = None
+        self.__cds_archive = None
+        self.__baseline_compilation_time = None
+        self.__count_compilations = 0
+        self.__total_compilation_time = 0
+
+        # Un mismo compilador puede ser utilizado desde varios hilos
+        self.__lock = threading.Lock()
         self.__build_jdk_bin_path()
 
     def __build_jdk_bin_path(self):
@@ -49,17 +78,191 @@ class Compiler:
             raise RuntimeError("Invalid JDK_HOME '" + jdk_home + "'")
 
         self.__jdk_home = jdk_home
+        self.__jdk_fingerprint = None
+        self.__cds_archive = None
         self.__build_jdk_bin_path()
 
     def get_jdk_home(self):
         return self.__jdk_home
 
+    def get_jdk_fingerprint(self):
+        """
+        Calcula una huella que identifica la versión del JDK utilizado para compilar. Se calcula a partir del archivo
+        JDK_HOME/release (que contiene la versión, el fabricante, etc.) o, si este no existe, a partir del ejecutable
+        javac. No depende de la ruta de instalación, por lo que es la misma en todas las máquinas con el mismo JDK.
+
+        :return: Huella del JDK en formato hexadecimal.
+        """
+        if self.__jdk_fingerprint is None:
+            release_file = Path(self.__jdk_home, "release")
+            if release_file.is_file():
+                data = release_file.read_bytes()
+            else:
+                data = (self.__jdk_bin_dir / javac).read_bytes()
+
+            self.__jdk_fingerprint = hashlib.sha256(data).hexdigest()
+
+        return self.__jdk_fingerprint
+
+    def set_startup_profile(self, profile_dir: Path):
+        """
+        Activa el perfil de arranque rápido de javac. Con este perfil javac se ejecuta con las opciones de la JVM
+        definidas en STARTUP_PROFILE_JVM_OPTIONS y, si el JDK lo permite, con un archivo de clases compartidas (AppCDS)
+        que se crea la primera vez que se utiliza el perfil con un JDK determinado y se reutiliza en las siguientes.
+
+        :param profile_dir: Directorio en cuyo subdirectorio CDS_DIR_NAME se guardan los archivos de clases
+                            compartidas. Se crea un archivo distinto para cada JDK, por lo que si el JDK cambia el
+                            archivo se vuelve a crear.
+        """
+        self.__profile_dir = Path(profile_dir) / CDS_DIR_NAME
+        self.__cds_archive = None
+
+    def get_count_compilations(self):
+        return self.__count_compilations
+
+    def get_average_compilation_time(self):
+        """
+        :return: Tiempo promedio, en segundos, de cada ejecución de javac o None si no se ha ejecutado ninguna.
+        """
+        if self.__count_compilations == 0:
+            return None
+
+        return self.__total_compilation_time / self.__count_compilations
+
+    def get_baseline_compilation_time(self):
+        """
+        :return: Tiempo promedio, en segundos, de una ejecución de javac sin opciones de la JVM medido al crear el
+                 archivo de clases compartidas o None si no se conoce.
+        """
+        return self.__baseline_compilation_time
+
+    def __get_jvm_options(self):
+        """
+        :return: Opciones de la JVM de javac según el perfil activo.
+        """
+        if self.__profile_dir is None:
+            return []
+
+        # Solo uno de los hilos crea el archivo de clases compartidas, el resto espera a que termine
+        with self.__lock:
+            if self.__cds_archive is None:
+                self.__cds_archive = self.__prepare_cds_archive()
+
+        options = list(STARTUP_PROFILE_JVM_OPTIONS)
+        if self.__cds_archive.exists():
+            options.append("-J-XX:SharedArchiveFile=" + str(self.__cds_archive))
+
+        return options
+
+    def __prepare_cds_archive(self):
+        """
+        Crea, si no existe, el archivo de clases compartidas (AppCDS) de javac para el JDK actual. Para crearlo se
+        compila varias veces un módulo vacío: primero BASELINE_RUNS veces sin ninguna opción de la JVM, para medir el
+        tiempo base de una ejecución sin el perfil, y luego con la opción -XX:ArchiveClassesAtExit para que la JVM
+        guarde las clases cargadas por javac.
+
+        El nombre del archivo incluye una huella calculada a partir de la versión del JDK, su ruta de instalación y la
+        fecha de modificación de su imagen de módulos (JDK_HOME/lib/modules), por lo que un JDK distinto (o
+        reinstalado) nunca utiliza un archivo creado por otro.
+
+        :return: Ruta al archivo de clases compartidas. Puede no existir si el JDK no permite crearlo o si ocurrió algún
+                 error creándolo.
+        """
+        modules_image = Path(self.__jdk_home, "lib", "modules")
+        key = self.get_jdk_fingerprint() + str(Path(self.__jdk_home).resolve())
+        if modules_image.exists():
+            key += str(modules_image.stat().st_mtime_ns)
+
+        archive_name = "javac-" + hashlib.sha256(key.encode()).hexdigest()[0:16]
+        archive = self.__profile_dir / (archive_name + ".jsa")
+        metadata_file = self.__profile_dir / (archive_name + ".json")
+
+        if archive.exists():
+            try:
+                self.__baseline_compilation_time = json.loads(metadata_file.read_text())["baseline"]
+            except Exception:
+                pass
+
+            return archive
+
+        jdk_version = self.__get_jdk_major_version()
+        if jdk_version is None or jdk_version < DYNAMIC_CDS_MIN_JDK_VERSION:
+            print("[WARN] Class data sharing archive for javac requires JDK " + str(DYNAMIC_CDS_MIN_JDK_VERSION) +
+                  " or later. Only startup JVM options will be used.")
+            return archive
+
+        print("[INFO] Creating class data sharing archive for javac '" + str(archive) + "'")
+        try:
+            self.__profile_dir.mkdir(parents=True, exist_ok=True)
+            with tempfile.TemporaryDirectory(prefix="jarmod-cds-") as training_dir:
+                training_dir = Path(training_dir)
+                (training_dir / "module-info.java").write_text("module jarmod.cds.training {" + os.linesep + "}")
+
+                # Ejecuciones base (sin el perfil de arranque rápido). Se promedian todas menos la primera
+                times = []
+                for _ in range(BASELINE_RUNS):
+                    start_time = time.perf_counter()
+                    errors = self.__run_javac([], training_dir, None)
+                    times.append(time.perf_counter() - start_time)
+                    if errors is not None:
+                        raise RuntimeError(errors)
+
+                self.__baseline_compilation_time = sum(times[1:]) / len(times[1:])
+
+                # Ejecución de entrenamiento. Se crea con otro nombre y luego se renombra para que otros procesos
+                # nunca utilicen un archivo escrito a medias
+                temp_archive = training_dir / "javac.jsa"
+                errors = self.__run_javac(STARTUP_PROFILE_JVM_OPTIONS +
+                                          ["-J-XX:ArchiveClassesAtExit=" + str(temp_archive)], training_dir, None)
+                if errors is not None or not temp_archive.exists():
+                    raise RuntimeError(errors if errors is not None else "Archive was not created")
+
+                metadata_file.write_text(json.dumps({"baseline": self.__baseline_compilation_time}))
+                os.replace(str(temp_archive), str(archive))
+        except Exception as e:
+            print("[WARN] Can not create class data sharing archive for javac. " + str(e))
+
+        return archive
+
+    def __get_jdk_major_version(self):
+        """
+        :return: Versión del JDK (9, 11, 17, etc.) según el archivo JDK_HOME/release o None si no se puede determinar.
+        """
+        try:
+            for line in Path(self.__jdk_home, "release").read_text().splitlines():
+                if line.startswith("JAVA_VERSION="):
+                    version = line[len("JAVA_VERSION="):].strip().strip('"').split(".")
+                    return int(version[1]) if version[0] == "1" else int(version[0].split("-")[0])
+        except Exception:
+            pass
+
+        return None
+
     def compile_module_descriptor(self, target_module_dir, module_path):
         if self.__jdk_bin_dir is None:
             raise ValueError("Impossible to locate JDK_HOME/bin path for JDK_HOME: " + self.__jdk_home)
 
+        # Las opciones se obtienen antes de medir el tiempo ya que la primera vez puede crearse el archivo de clases
+        # compartidas
+        jvm_options = self.__get_jvm_options()
+
+        start_time = time.perf_counter()
+        errors = self.__run_javac(jvm_options, target_module_dir, module_path)
+        with self.__lock:
+            self.__count_compilations += 1
+            self.__total_compilation_time += time.perf_counter() - start_time
+
+        return errors
+
+    def __run_javac(self, jvm_options, target_module_dir, module_path):
+        """
+        Compila el archivo target_module_dir/module-info.java.
+
+        :return: None si la compilación terminó satisfactoriamente o la salida de la consola de compilación (junto con el
+                 comando ejecutado) en caso contrario.
+        """
         # Construir el comando de compilación
-        command_list = [str((self.__jdk_bin_dir / javac).resolve()), "-d", str(target_module_dir)]
+        command_list = [str((self.__jdk_bin_dir / javac).resolve())] + jvm_options + ["-d", str(target_module_dir)]
 
         if module_path is not None:
             command_list.append("--module-path")
@@ -70,7 +273,7 @@ class Compiler:
         # Ejecutar el comando de compilación
         compiler_process = subprocess.run(command_list, text=True, stderr=subprocess.PIPE)
         # Si hay error de compilación devuelvo la salida de la consola de compilación
-        if compiler_process.returncode is not 0:
+        if compiler_process.returncode != 0:
             return "Command: " + self.__get_full_command_str(command_list) + os.linesep + compiler_process.stderr
 
     @classmethod
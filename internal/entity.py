@@ -22,15 +22,24 @@
 
 
 class Module:
-    def __init__(self, name: str, exportsPackages=None, requiresModules=None):
+    def __init__(self, name: str, exportsPackages=None, requiresModules=None, automatic=False):
         self.__name = name
         self.__exports_packages = exportsPackages
         self.__requires_modules = requiresModules
+        self.__automatic = automatic
 
     @classmethod
     def from_json(cls, data):
         return cls(**data)
 
+    def to_json(self):
+        return {
+            "name": self.__name,
+            "exportsPackages": self.__exports_packages,
+            "requiresModules": self.__requires_modules,
+            "automatic": self.__automatic
+        }
+
     def get_name(self):
         return self.__name
 
@@ -40,6 +49,9 @@ class Module:
     def get_requires_modules(self):
         return self.__requires_modules
 
+    def is_automatic(self):
+        return self.__automatic
+
 
 class Artifact:
     def __init__(self, name=None, module=None):
@@ -53,6 +65,12 @@ class Artifact:
     def from_json(cls, data):
         return cls(**data)
 
+    def to_json(self):
+        return {
+            "name": self.__name,
+            "module": self.__module.to_json() if self.__module is not None else None
+        }
+
     def get_name(self):
         return self.__name
 
@@ -66,4 +84,33 @@ class Artifact:
         if not isinstance(other, type(self)):
             return NotImplemented
 
-        return self.__name == other.__name
\ No newline at end of file
+        return self.__name == other.__name
+
+
+class Job:
+    """
+    Entrada de un manifiesto de procesamiento por lotes. Cada entrada equivale a una ejecución de
+    'jarmod DESCRIPTOR SOURCE [--dest <path>] [--module-path <path>]'.
+    """
+
+    def __init__(self, descriptor=None, source=None, dest=None, modulePath=None):
+        self.__descriptor = descriptor
+        self.__source = source
+        self.__dest = dest
+        self.__module_path = modulePath
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(**data)
+
+    def get_descriptor(self):
+        return self.__descriptor
+
+    def get_source(self):
+        return self.__source
+
+    def get_dest(self):
+        return self.__dest
+
+    def get_module_path(self):
+        return self.__module_path
@@ -0,0 +1,191 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+import sys
+import threading
+import time
+
+# Intervalo, en segundos, con que se consulta si las tareas que esperan por una condición externa ya pueden iniciarse
+POLL_INTERVAL = 0.5
+
+
+class ParallelExecutor:
+    """
+    Ejecuta tareas en varios hilos respetando las dependencias entre ellas y un presupuesto de espacio en disco.
+
+    Una tarea se inicia cuando han terminado todas las tareas de las que depende, hay un hilo libre y el espacio en
+    disco que necesita cabe en lo que queda del presupuesto. El espacio de cada tarea tiene dos partes: la temporal, que
+    se libera cuando la tarea termina, y la permanente (sus resultados), que queda descontada del presupuesto hasta el
+    final de la ejecución. Si una tarea no cabe en el presupuesto se ejecuta sola, para que el proceso nunca se detenga.
+
+    Las tareas que esperan por una condición externa (por ejemplo, un JAR modularizado por otra máquina) no ocupan
+    ningún hilo mientras esperan: la condición se consulta periódicamente y mientras tanto se ejecutan otras tareas.
+
+    Mientras se ejecutan varias tareas a la vez la salida estándar de cada una se acumula y se escribe completa al
+    terminar, para que los mensajes de distintos JARs no se mezclen.
+    """
+
+    def __init__(self, workers, disk_budget=None):
+        """
+        :param workers: Cantidad máxima de tareas simultáneas.
+        :param disk_budget: Espacio en disco en bytes que pueden ocupar las tareas en ejecución o None si no hay límite.
+        """
+        self.__workers = max(1, workers)
+        self.__disk_budget = disk_budget
+
+    def get_workers(self):
+        return self.__workers
+
+    def get_disk_budget(self):
+        return self.__disk_budget
+
+    def run(self, tasks):
+        """
+        Ejecuta las tareas 'tasks' y espera a que todas terminen.
+
+        :param tasks: Lista de tuplas (función sin parámetros, índices de las tareas de las que depende, tupla (espacio
+                      en disco temporal, espacio en disco permanente) que necesita en bytes, función sin parámetros
+                      que indica si la tarea puede iniciarse o None). Las dependencias deben ser tareas anteriores en
+                      la lista. La última función permite esperar por condiciones externas (por ejemplo, por otros
+                      procesos) y se consulta periódicamente.
+        :exception Exception: La primera excepción lanzada por alguna de las tareas, una vez que todas terminaron.
+        """
+        output = None
+        if self.__workers > 1:
+            output = _ThreadBufferedOutput(sys.stdout)
+            sys.stdout = output
+
+        try:
+            self.__run(tasks, output)
+        finally:
+            if output is not None:
+                sys.stdout = output.get_stream()
+
+    def __run(self, tasks, output):
+        pending = list(range(len(tasks)))
+        finished = set()
+        running = {}
+        disk_in_use = 0
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            while len(pending) > 0 or len(running) > 0:
+                waiting = False
+
+                # Iniciar, en orden, las tareas listas para ejecutarse cuyo espacio en disco cabe en el presupuesto
+                for index in list(pending):
+                    if len(running) >= self.__workers:
+                        break
+
+                    function, dependencies, disk_usage, ready = tasks[index]
+                    if not all([d in finished for d in dependencies]):
+                        continue
+
+                    if ready is not None and not ready():
+                        waiting = True
+                        continue
+
+                    temporary_disk_usage, persistent_disk_usage = disk_usage
+                    if self.__disk_budget is not None and len(running) > 0 and \
+                            disk_in_use + temporary_disk_usage + persistent_disk_usage > self.__disk_budget:
+                        continue
+
+                    pending.remove(index)
+                    disk_in_use += temporary_disk_usage + persistent_disk_usage
+                    running[executor.submit(self.__run_task, function, output)] = (index, temporary_disk_usage)
+
+                if len(running) == 0:
+                    if waiting:
+                        time.sleep(POLL_INTERVAL)
+                        continue
+
+                    # Solo ocurre si alguna dependencia no es una tarea anterior en la lista
+                    raise RuntimeError("Tasks with unsatisfiable dependencies: " + str(pending))
+
+                done, not_done = wait(list(running), timeout=POLL_INTERVAL if waiting else None,
+                                      return_when=FIRST_COMPLETED)
+                for future in done:
+                    # Solo se libera el espacio temporal, los resultados de la tarea siguen ocupando el disco
+                    index, temporary_disk_usage = running.pop(future)
+                    disk_in_use -= temporary_disk_usage
+                    finished.add(index)
+                    if future.exception() is not None and error is None:
+                        error = future.exception()
+
+        if error is not None:
+            raise error
+
+    @classmethod
+    def __run_task(cls, function, output):
+        if output is None:
+            return function()
+
+        output.begin()
+        try:
+            return function()
+        finally:
+            output.end()
+
+
+class _ThreadBufferedOutput:
+    """
+    Flujo de salida que acumula lo escrito por cada hilo entre begin() y end() y lo escribe de una sola vez en el flujo
+    original. Lo escrito fuera de estos límites (por ejemplo, desde el hilo principal) se escribe directamente.
+    """
+
+    def __init__(self, stream):
+        self.__stream = stream
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+
+    def get_stream(self):
+        return self.__stream
+
+    def begin(self):
+        self.__local.buffer = []
+
+    def end(self):
+        data = "".join(self.__local.buffer)
+        self.__local.buffer = None
+        with self.__lock:
+            self.__stream.write(data)
+            self.__stream.flush()
+
+    def write(self, data):
+        buffer = getattr(self.__local, "buffer", None)
+        if buffer is not None:
+            buffer.append(data)
+            return len(data)
+
+        with self.__lock:
+            return self.__stream.write(data)
+
+    def flush(self):
+        if getattr(self.__local, "buffer", None) is None:
+            self.__stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.__stream, name)
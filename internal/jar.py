@@ -0,0 +1,353 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from pathlib import Path
+import contextlib
+import copy
+import io
+import os
+import shutil
+import time
+import zipfile
+
+# Tamaño del buffer utilizado para copiar el contenido de los archivos
+COPY_BUFFER_SIZE = 1024 * 1024
+
+MANIFEST_NAME = "META-INF/MANIFEST.MF"
+
+# Menor fecha representable en un archivo ZIP
+MIN_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Atributos externos (permisos Unix) de las entradas de los JARs reproducibles
+FILE_ATTR = 0o100644 << 16
+DIR_ATTR = (0o040755 << 16) | 0x10
+
+
+class JarPatcher:
+    """
+    Operaciones sobre archivos JAR necesarias para modularizarlos.
+
+    Los JARs de origen pueden ser la ruta a un archivo (Path o str) o su contenido (bytes). Los JARs de destino pueden
+    ser la ruta a un archivo (Path o str) o un objeto de archivo binario abierto para lectura y escritura (por ejemplo,
+    io.BytesIO), el cual no es cerrado.
+    """
+
+    @classmethod
+    def open_jar(cls, source):
+        """
+        :return: ZipFile abierto para lectura del JAR 'source'.
+        """
+        if isinstance(source, (str, Path)):
+            return zipfile.ZipFile(source, "r")
+
+        return zipfile.ZipFile(io.BytesIO(source), "r")
+
+    @classmethod
+    def __open_source(cls, source):
+        if isinstance(source, (str, Path)):
+            return open(source, "rb")
+
+        return io.BytesIO(source)
+
+    @classmethod
+    def __open_target(cls, target):
+        if isinstance(target, (str, Path)):
+            Path(target).parent.mkdir(parents=True, exist_ok=True)
+            return open(target, "w+b")
+
+        return contextlib.nullcontext(target)
+
+    @classmethod
+    def extract(cls, jar_file: zipfile.ZipFile, output_dir: Path):
+        """
+        Extrae el contenido del archivo JAR en el directorio 'output_dir'.
+
+        :param jar_file: Archivo JAR abierto para lectura.
+        :param output_dir: Directorio donde se extraerá el contenido.
+        :return: Lista con las rutas de las entradas que no pudieron ser extraídas.
+        """
+        not_extracted = []
+
+        # OJO: No se puede utilizar ZipFile.extractall() porque falla en Windows si la longitud de la ruta del
+        #      archivo a crear es mayor que el límite definido por el sistema operativo
+        for entry_path in jar_file.namelist():
+            try:
+                jar_file.extract(member=entry_path, path=output_dir)
+            except FileNotFoundError as e:
+                # Si el mensaje de error inicia con '[Errno 2] No such file or directory: ' seguramente el error
+                # está relacionado con la longitud de la ruta del archivo a crear.
+                # Esto puede causar que no se pueda compilar el descriptor del módulo si este error impidió que
+                # se creara alguno de los paquetes que son exportados
+                if str(e).startswith("[Errno 2] No such file or directory: "):
+                    not_extracted.append(str(e).replace("[Errno 2] No such file or directory: ", ""))
+                else:
+                    raise e
+
+        return not_extracted
+
+    @classmethod
+    def add_module_descriptor(cls, source, target, module_descriptor_data, reproducible=False):
+        """
+        Crea en 'target' una copia exacta del JAR 'source' y le agrega la entrada /module-info.class cuyo contenido
+        será 'module_descriptor_data'.
+
+        :param source: JAR original.
+        :param target: JAR modularizado.
+        :param module_descriptor_data: Contenido de la entrada /module-info.class
+        :param reproducible: Si es True el JAR se reescribe por completo con metadatos normalizados (ver
+                             '__normalize_info') para que su contenido sea idéntico byte a byte entre ejecuciones.
+        """
+        if reproducible:
+            cls.__rewrite(source, target, None, {"module-info.class": module_descriptor_data}, True)
+            return
+
+        with cls.__open_target(target) as target_file:
+            # Hago una copia exacta del JAR
+            with cls.__open_source(source) as source_file:
+                shutil.copyfileobj(source_file, target_file, COPY_BUFFER_SIZE)
+
+            # Agrego a la copia del archivo JAR original el descriptor del módulo
+            with zipfile.ZipFile(target_file, mode="a") as mod_jar_file:
+                mod_jar_file.writestr("module-info.class", module_descriptor_data)
+
+    @classmethod
+    def add_automatic_module_name(cls, source, target, module_name, reproducible=False):
+        """
+        Crea en 'target' una copia del JAR 'source' agregando al manifiesto (/META-INF/MANIFEST.MF) el atributo
+        'Automatic-Module-Name: module_name'. Si el JAR no tiene manifiesto se crea uno nuevo.
+
+        Las entradas se copian una a una utilizando flujos, por lo que nunca se carga en memoria el JAR completo.
+
+        :param source: JAR original.
+        :param target: JAR modularizado.
+        :param module_name: Nombre del módulo automático
+        :param reproducible: Si es True se normalizan los metadatos y el orden de las entradas.
+        """
+        cls.__rewrite(source, target, lambda manifest: cls.__add_automatic_module_name(manifest, module_name), {},
+                      reproducible)
+
+    @classmethod
+    def __rewrite(cls, source, target, manifest_transformer, new_entries, reproducible):
+        """
+        Escribe en 'target' todas las entradas del JAR 'source' copiándolas una a una mediante flujos.
+
+        Si no se deben normalizar las entradas, las que no cambian se copian tal cual (encabezado local y datos
+        comprimidos) sin descomprimirlas ni volver a comprimirlas, por lo que la copia avanza a la velocidad del disco.
+        Solo se escriben de nuevo el manifiesto, las entradas agregadas y el directorio central.
+
+        :param manifest_transformer: Función que recibe el contenido del manifiesto (b"" si no existe) y devuelve el
+                                     nuevo contenido, o None para copiar el manifiesto sin cambios.
+        :param new_entries: Diccionario {nombre: contenido} con las entradas a agregar.
+        :param reproducible: Si es True se normalizan los metadatos y las entradas se ordenan por nombre, dejando
+                             primero el directorio META-INF/ y el manifiesto, como hace la herramienta jar.
+        """
+        with cls.open_jar(source) as jar_file, cls.__open_source(source) as source_file, \
+                cls.__open_target(target) as target_file:
+            # Los bytes anteriores a la primera entrada (por ejemplo, el script de arranque de un JAR ejecutable) se
+            # copian tal cual
+            cls.__copy_prefix(jar_file, source_file, target_file)
+
+            with zipfile.ZipFile(target_file, "w") as mod_jar_file:
+                end_offsets = cls.__get_entry_end_offsets(jar_file)
+
+                # Lista de (ZipInfo, contenido); contenido None indica que la entrada se copia desde 'source'
+                entries = []
+                infos = jar_file.infolist()
+                if manifest_transformer is not None and MANIFEST_NAME not in [i.filename for i in infos]:
+                    entries.append((cls.__new_info(MANIFEST_NAME), manifest_transformer(b"")))
+
+                for info in infos:
+                    if manifest_transformer is not None and info.filename == MANIFEST_NAME:
+                        entries.append((info, manifest_transformer(jar_file.read(info))))
+                    else:
+                        entries.append((info, None))
+
+                for name, data in new_entries.items():
+                    entries.append((cls.__new_info(name), data))
+
+                if reproducible:
+                    entries.sort(key=lambda e: cls.__get_entry_sort_key(e[0].filename))
+
+                for info, data in entries:
+                    mod_info = cls.__normalize_info(info) if reproducible else copy.copy(info)
+                    if data is None and not reproducible:
+                        cls.__copy_raw_entry(source_file, mod_jar_file, mod_info, end_offsets[info.header_offset])
+                    elif data is not None:
+                        mod_jar_file.writestr(mod_info, data)
+                    elif info.is_dir():
+                        mod_jar_file.writestr(mod_info, b"")
+                    else:
+                        force_zip64 = info.file_size > zipfile.ZIP64_LIMIT
+                        with jar_file.open(info) as src, \
+                                mod_jar_file.open(mod_info, "w", force_zip64=force_zip64) as dst:
+                            shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+
+    @classmethod
+    def __copy_prefix(cls, jar_file: zipfile.ZipFile, source_file, target_file):
+        """
+        Copia en 'target_file' los bytes del JAR original (abierto como archivo binario en 'source_file') anteriores a
+        su primera entrada. Solo existen en JARs precedidos por otro contenido, como los JARs ejecutables que comienzan
+        con un script de arranque.
+        """
+        offsets = [info.header_offset for info in jar_file.infolist()]
+        remaining = min(offsets) if len(offsets) > 0 else jar_file.start_dir
+
+        source_file.seek(0)
+        while remaining > 0:
+            chunk = source_file.read(min(remaining, COPY_BUFFER_SIZE))
+            if len(chunk) == 0:
+                raise zipfile.BadZipFile("Truncated JAR prefix")
+            target_file.write(chunk)
+            remaining -= len(chunk)
+
+    @classmethod
+    def __get_entry_end_offsets(cls, jar_file: zipfile.ZipFile):
+        """
+        :return: Diccionario posición de inicio->posición de fin de cada una de las entradas del JAR (encabezado local,
+                 datos comprimidos y descriptor de datos, si existe). Cada entrada termina donde comienza la siguiente o,
+                 la última, donde comienza el directorio central.
+        """
+        offsets = sorted(set([info.header_offset for info in jar_file.infolist()]))
+        return dict(zip(offsets, offsets[1:] + [jar_file.start_dir]))
+
+    @classmethod
+    def __copy_raw_entry(cls, source_file, mod_jar_file: zipfile.ZipFile, mod_info: zipfile.ZipInfo, end_offset):
+        """
+        Copia tal cual en 'mod_jar_file' los bytes de la entrada 'mod_info' del JAR original (abierto como archivo
+        binario en 'source_file') y la registra para que sea incluida en el directorio central.
+
+        ZipFile no permite escribir entradas ya comprimidas, por lo que se utilizan los mismos atributos internos que
+        ZipFile.open() en modo escritura: la posición donde comienza la siguiente entrada (start_dir) y el listado de
+        entradas del directorio central (filelist y NameToInfo).
+        """
+        source_file.seek(mod_info.header_offset)
+        remaining = end_offset - mod_info.header_offset
+
+        mod_jar_file.fp.seek(mod_jar_file.start_dir)
+        mod_info.header_offset = mod_jar_file.fp.tell()
+        while remaining > 0:
+            chunk = source_file.read(min(remaining, COPY_BUFFER_SIZE))
+            if len(chunk) == 0:
+                raise zipfile.BadZipFile("Truncated entry '" + mod_info.filename + "'")
+            mod_jar_file.fp.write(chunk)
+            remaining -= len(chunk)
+
+        mod_jar_file.start_dir = mod_jar_file.fp.tell()
+        mod_jar_file.filelist.append(mod_info)
+        mod_jar_file.NameToInfo[mod_info.filename] = mod_info
+
+    @classmethod
+    def __new_info(cls, name):
+        info = zipfile.ZipInfo(name, time.localtime(time.time())[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = FILE_ATTR
+        return info
+
+    @classmethod
+    def __normalize_info(cls, info: zipfile.ZipInfo):
+        """
+        :return: Nuevo ZipInfo para 'info' con fecha fija (ver 'get_reproducible_date_time'), sin campos extra ni
+                 comentario, atributos de archivo/directorio fijos y compresión DEFLATE (STORED para directorios).
+        """
+        mod_info = zipfile.ZipInfo(info.filename, cls.get_reproducible_date_time())
+        mod_info.create_system = 3
+        if info.is_dir():
+            mod_info.compress_type = zipfile.ZIP_STORED
+            mod_info.external_attr = DIR_ATTR
+        else:
+            mod_info.compress_type = zipfile.ZIP_DEFLATED
+            mod_info.external_attr = FILE_ATTR
+
+        return mod_info
+
+    @classmethod
+    def __get_entry_sort_key(cls, name):
+        if name == "META-INF/":
+            return 0, name
+        if name == MANIFEST_NAME:
+            return 1, name
+        return 2, name
+
+    @classmethod
+    def get_reproducible_date_time(cls):
+        """
+        :return: Fecha (tupla de 6 elementos) utilizada en las entradas de los JARs reproducibles. Se toma de la
+                 variable de entorno SOURCE_DATE_EPOCH (https://reproducible-builds.org/specs/source-date-epoch/) si
+                 está definida, en caso contrario se utiliza 1980-01-01 00:00:00 (la menor fecha admitida por ZIP).
+        """
+        epoch = os.environ.get("SOURCE_DATE_EPOCH")
+        if epoch:
+            try:
+                date_time = time.gmtime(int(epoch))[:6]
+                if date_time >= MIN_DATE_TIME:
+                    return date_time
+            except (ValueError, OverflowError, OSError):
+                pass
+
+        return MIN_DATE_TIME
+
+    @classmethod
+    def __add_automatic_module_name(cls, manifest_data, module_name):
+        """
+        Agrega (o reemplaza) el atributo 'Automatic-Module-Name' en la sección principal del manifiesto.
+
+        :param manifest_data: Contenido original del manifiesto. Vacío si el JAR no tiene manifiesto.
+        :param module_name: Nombre del módulo automático.
+        :return: Contenido del nuevo manifiesto.
+        """
+        text = manifest_data.decode("utf-8")
+        line_separator = "\r\n" if "\r\n" in text or len(text) == 0 else "\n"
+        lines = text.splitlines()
+
+        if len(lines) == 0:
+            lines = ["Manifest-Version: 1.0"]
+
+        # La sección principal termina en la primera línea vacía
+        main_section_end = lines.index("") if "" in lines else len(lines)
+        main_section = lines[0:main_section_end]
+        other_sections = lines[main_section_end:]
+
+        # Quitar el atributo si ya existe (junto con sus líneas de continuación, que empiezan con un espacio)
+        new_main_section = []
+        skipping = False
+        for line in main_section:
+            if line.startswith(" ") and skipping:
+                continue
+
+            skipping = line.lower().startswith("automatic-module-name:")
+            if not skipping:
+                new_main_section.append(line)
+
+        # Las líneas del manifiesto no pueden tener más de 72 bytes, el resto continúa en las líneas siguientes
+        attribute_lines = [""]
+        for c in "Automatic-Module-Name: " + module_name:
+            if len((attribute_lines[-1] + c).encode("utf-8")) > 72:
+                attribute_lines.append(" ")
+            attribute_lines[-1] += c
+
+        new_main_section.extend(attribute_lines)
+
+        if len(other_sections) == 0:
+            other_sections = [""]
+
+        return (line_separator.join(new_main_section + other_sections) + line_separator).encode("utf-8")
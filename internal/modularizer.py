@@ -23,30 +23,75 @@
 from .entity import Artifact
 from .exception import ParseException
 from .compiler import Compiler
-from .tda import Tree
-from .tda import TreeNode
+from .analyzer import PreflightAnalyzer
+from .cache import ModuleCache
+from .plan import BuildPlan
+from .plan import PLAN_FILE_NAME
+from .shard import ShardPartitioner
+from .shard import ShardReport
+from .planner import DependencyPlanner
+from .jar import JarPatcher
+from .executor import ParallelExecutor
+from .executor import POLL_INTERVAL
+from .resources import ResourceProbe
 from pathlib import Path
 import json
+import threading
+import time
 import zipfile
 import os
 
+# Nombre del directorio, dentro del directorio de destino, donde se extraen los JARs. Al estar en un subdirectorio los
+# descriptores compilados de los JARs en proceso no son visibles para javac en el --module-path
+WORK_DIR_NAME = ".jarmod-work"
+
+# Tiempo máximo, en segundos, que un fragmento (shard) espera por los módulos requeridos asignados a otros fragmentos
+SHARD_WAIT_TIMEOUT = 3600
+
 
 class Modularizer:
     def __init__(self, descriptor_file: Path, source_dir: Path, destination_dir: Path, jdk_home_path: Path,
-                 module_path):
+                 module_path, cache: ModuleCache = None, compiler: Compiler = None, automatic_modules=False,
+                 shard=None, keep_going=False, reproducible=False, jobs=1,
+                 shard_timeout=SHARD_WAIT_TIMEOUT):
         self.__descriptor_file = descriptor_file
         self.__source_dir = source_dir
         self.__destination_dir = destination_dir
         self.__jdk_home_path = jdk_home_path
         self.__module_path = module_path
+        self.__cache = cache
+        self.__automatic_modules = automatic_modules
+        self.__shard = shard
+        self.__keep_going = keep_going
+        self.__reproducible = reproducible
+        self.__jobs = jobs
+        self.__shard_timeout = shard_timeout
 
         self.__artifact_set = {}
         self.__artifact_list = []
         self.__jar_files_list = []
         self.__count_modularized = 0
         self.__count_error_founds = 0
+        self.__modularized_artifacts = []
+        self.__skipped_artifacts = {}
+
+        self.__compiler = compiler
+        self.__plan = None
+        self.__analyzer = PreflightAnalyzer()
+
+        # Módulos asignados a otros fragmentos (nombre del módulo->(nombre del artefacto, fragmento)), reporte del
+        # fragmento actual y descriptores compilados obtenidos de la caché antes de la modularización
+        self.__remote_modules = {}
+        self.__shard_report = None
+        self.__prefetched_module_info = {}
 
-        self.__compiler = None
+        # Estado final de los módulos de otros fragmentos (nombre del módulo->(terminado, causa del fallo)) y último
+        # reporte leído de cada fragmento (índice->(momento de la lectura, reporte, artefactos modularizados))
+        self.__remote_module_states = {}
+        self.__remote_reports = {}
+
+        # Protege los contadores y listados de resultados, que son actualizados desde varios hilos
+        self.__lock = threading.Lock()
 
     def get_count_modularized(self):
         """
@@ -62,6 +107,13 @@ class Modularizer:
         """
         return self.__count_error_founds
 
+    def get_skipped_artifacts(self):
+        """
+        :return: Diccionario nombre de JAR->nombre del JAR causante para los JARs que no fueron procesados porque
+                 dependen (directa o indirectamente) de un módulo que no pudo ser modularizado.
+        """
+        return self.__skipped_artifacts
+
     def start(self):
         """
         Inicia el proceso de modularización.
@@ -69,27 +121,104 @@ class Modularizer:
         :return: True si el proceso terminó sin errores, False en caso contrario.
         :exception ParseException: Si ocurrió algún error deserializando el archivo descriptor de modularización
         """
+        tasks = self.prepare()
+        if tasks is None:
+            return False
+
+        self.build_executor(self.__jobs, [self.__destination_dir]).run(tasks)
+        return self.finish()
+
+    def prepare(self):
+        """
+        Prepara la modularización: carga el plan, analiza los JARs y construye las tareas que modularizan cada uno de
+        ellos, sin ejecutarlas. Permite ejecutar en un mismo ParallelExecutor las tareas de varias instancias (ver la
+        opción --batch), tras lo cual debe invocarse finish().
+
+        :return: Lista de tareas para ParallelExecutor.run() o None si no hay nada que modularizar.
+        :exception ParseException: Si ocurrió algún error deserializando el archivo descriptor de modularización
+        """
         print()
         print("Starting modularization process...")
         print("--------------------------------------------------------------------")
         print()
 
-        self.__parse_descriptor()
+        self.__load_plan()
 
-        if len(self.__artifact_set) == 0:
+        if len(self.__artifact_list) == 0:
             print("Empty descriptor.")
-            return False
+            return None
 
         self.__jar_files_list = [f for f in self.__source_dir.iterdir() if f.is_file() and f.suffix == ".jar"]
         if len(self.__jar_files_list) == 0:
             print("There are no JAR files in source directory")
-            return False
+            return None
 
-        self.__process_jars()
+        return self.__build_tasks()
 
-        return self.__count_error_founds == 0
+    def finish(self):
+        """
+        Termina la modularización una vez ejecutadas las tareas construidas por prepare(): reporta los JARs omitidos y
+        guarda el plan para las siguientes ejecuciones.
 
-    def __parse_descriptor(self):
+        :return: True si el proceso terminó sin errores, False en caso contrario.
+        """
+        try:
+            self.__get_work_dir().rmdir()
+        except OSError:
+            # No existe (ningún JAR fue extraído) o no está vacío
+            pass
+
+        if self.__shard_report is not None:
+            self.__shard_report.set_finished(True)
+            self.__shard_report.save(self.__destination_dir)
+
+        if len(self.__skipped_artifacts) > 0:
+            print()
+            print("[WARN] The following JAR files were skipped because they depend on modules that could not be "
+                  "modularized:")
+            for name, cause in self.__skipped_artifacts.items():
+                print("[WARN]     '" + name + "' skipped because of '" + cause + "'")
+
+        # Guardar el plan (con los paquetes y descriptores de los JARs procesados) para las siguientes ejecuciones
+        try:
+            self.__plan.save(self.__destination_dir / PLAN_FILE_NAME)
+        except Exception as e:
+            print("[WARN] Error saving modularization plan. " + str(e))
+
+        return self.__count_error_founds == 0 and len(self.__skipped_artifacts) == 0
+
+    def __load_plan(self):
+        """
+        Carga el plan de modularización guardado en el directorio de destino por una ejecución anterior. Si no existe o
+        el descriptor de modularización cambió desde entonces, se deserializa el descriptor y se ordenan los artefactos
+        para crear un nuevo plan.
+
+        Al terminar, self.__artifact_list contendrá los artefactos en el orden en que deben ser modularizados.
+
+        :exception ParseException: Si ocurre algún error leyendo o deserializando el descriptor de modularización.
+        """
+        try:
+            descriptor_data = self.__descriptor_file.read_bytes()
+        except Exception as e:
+            raise ParseException("[ERROR] Error reading modularization descriptor file. " + str(e))
+
+        descriptor_hash = BuildPlan.compute_descriptor_hash(descriptor_data)
+        self.__plan = BuildPlan.load(self.__destination_dir / PLAN_FILE_NAME, descriptor_hash)
+
+        if self.__plan is not None:
+            print("[INFO] Using modularization plan from previous execution")
+            self.__artifact_list = self.__plan.get_artifacts()
+            self.__artifact_set = set(self.__artifact_list)
+        else:
+            self.__parse_descriptor(descriptor_data)
+
+            # Antes de modularizar el JAR es necesario primero ordenar los artefactos de acuerdo a sus dependencias para
+            # asegurarnos de que antes de modularizar un artefacto ya han sido modularizados todos aquellos de los que
+            # este depende
+            levels = self.__sort_artifacts()
+            self.__plan = BuildPlan(descriptor_hash, self.__artifact_list, levels)
+
+    def __parse_descriptor(self, descriptor_data):
         """
         Deserializa el archivo JSON descriptor de modularización.
 
@@ -98,6 +227,7 @@ class Modularizer:
         solamente el primero de ellos. Un artefacto se considera duplicado si se repite el atributo
         'name'.
 
+        :param descriptor_data: Contenido del archivo descriptor de modularización.
         :exception ParseException: Si ocurre algún error que impida la deserialización.
         """
 
@@ -105,16 +235,16 @@ class Modularizer:
         # https://medium.com/@yzhong.cs/serialize-and-deserialize-complex-json-in-python-205ecc636caa
 
         try:
-            descriptor_text = self.__descriptor_file.read_text()
+            descriptor_text = descriptor_data.decode()
             self.__artifact_set = set(map(Artifact.from_json, json.loads(descriptor_text)))
         except Exception as e:
             raise ParseException("[ERROR] Error parsing modularization descriptor file. " + str(e))
 
-    def __process_jars(self):
+    def __build_tasks(self):
         """
-        Procesa los archivos JAR encontrados en el directorio {@code sourceDir} para generar su correspondiente JAR
-        modularizado. La modularización solo se lleva a cabo con aquellos archivos para los cuales exista un entrada
-        correspondiente en el descriptor de modularización.
+        Construye las tareas que procesan los archivos JAR encontrados en el directorio {@code sourceDir} para generar su
+        correspondiente JAR modularizado. La modularización solo se lleva a cabo con aquellos archivos para los cuales
+        exista un entrada correspondiente en el descriptor de modularización.
 
         Las entradas en descriptor de modularización serán analizadas para determinar el orden en el cual deben ser
         procesados los JARs, teniendo en cuenta las dependencias entre ellos. Aquellos que menos niveles de dependencias
@@ -125,126 +255,440 @@ class Modularizer:
         Es importante aclarar que las únicas dependencias que cuentan para los fines explicados arriba son aquellas que
         hacen referncia a los módulos que deseamos crear (aquellos cuya definición está declarada en el descriptor de
         modularización), nunca las que referencian a terceros módulos ya existentes.
+
+        :return: Lista de tareas para ParallelExecutor.run() o None si no se encontró el JDK.
         """
-        # Crear la instancia del compilador
-        try:
-            self.__compiler = Compiler()
-            if self.__jdk_home_path is not None:
-                self.__compiler.set_jdk_home(self.__jdk_home_path)
-        except Exception as e:
-            print("[ERROR] " + str(e))
+        # Crear la instancia del compilador si no fue recibida una ya creada (compartida con otras instancias)
+        if self.__compiler is None:
+            try:
+                self.__compiler = Compiler()
+                if self.__jdk_home_path is not None:
+                    self.__compiler.set_jdk_home(self.__jdk_home_path)
+            except Exception as e:
+                print("[ERROR] " + str(e))
 
         if self.__compiler.get_jdk_home() is None:
             # Si llega aquí es porque:
             # 1 - No se especificó la ruta del JDK a utilar o esta no es válida, y
             # 2 - No existe la variable de entorno JAVA_HOME
             print("[ERROR] JAVA_HOME enviroment variable is not defined.")
-            return
+            return None
 
         print("[INFO] Using JDK_HOME: " + str(self.__compiler.get_jdk_home().resolve()))
         print()
 
-        # Antes de modularizar el JAR es necesario primero ordenar los artefactos de acuerdo a sus dependencias para
-        # asegurarnos de que antes de modularizar un artefacto ya han sido modularizados todos aquellos de los que este
-        # depende
-        self.__sort_artifacts()
+        # Asociar cada artefacto con su archivo JAR manteniendo el orden de modularización
+        jar_files_by_name = {f.name: f for f in self.__jar_files_list}
+        jobs = [(a, jar_files_by_name[a.get_name()]) for a in self.__artifact_list if a.get_name() in jar_files_by_name]
+
+        # Si solo se debe modularizar un fragmento (shard) se descartan los artefactos de los demás fragmentos
+        all_jobs = jobs
+        if self.__shard is not None:
+            jobs = self.__select_shard_jobs(jobs)
+
+        # Antes de extraer y compilar cualquier JAR se analizan los paquetes de todos ellos para descartar aquellos que
+        # con seguridad no podrán ser modularizados. Se analizan también los de los demás fragmentos, ya que un ciclo o
+        # un paquete leído de dos módulos puede involucrar artefactos de distintos fragmentos
+        self.__analyze_packages(all_jobs, jobs)
+
+        # Módulos que no pudieron ser modularizados (nombre del módulo->nombre del JAR causante del fallo). Un módulo que
+        # depende de otro que falló tampoco podrá ser modularizado, por lo que se omite y se propaga la causa original
+        failed_modules = self.__get_remote_failed_modules(all_jobs)
+
+        def modularize(artifact, file):
+            module = artifact.get_module()
+            failure_cause = None
+            if not self.__keep_going and self.__analyzer.get_problems(artifact) is None:
+                failure_cause = next((failed_modules[m] for m in module.get_requires_modules() or []
+                                      if m in failed_modules), None)
+                if failure_cause is None:
+                    failure_cause = self.__get_remote_failure_cause(module)
+
+            # Los artefactos con problemas propios (por ejemplo, los que forman parte de un ciclo) se reportan como
+            # errores aunque dependan de otros que fallaron
+            if failure_cause is not None:
+                print("[WARN] '" + file.name + "' skipped because of '" + failure_cause + "'")
+                self.__skipped_artifacts[file.name] = failure_cause
+            elif self.__analyzer.get_problems(artifact) is not None:
+                failure_cause = file.name
+                self.__add_error()
+            elif self.__is_automatic(artifact):
+                if not self.__modularize_jar_as_automatic(file, artifact):
+                    failure_cause = file.name
+                    self.__add_error()
+            elif not self.__modularize_jar(file, artifact):
+                failure_cause = file.name
+                self.__add_error()
+
+            if failure_cause is not None:
+                failed_modules.setdefault(module.get_name(), failure_cause)
+
+            if self.__shard_report is not None:
+                self.__save_shard_report(artifact, failure_cause)
+
+        # Modularizar los JARs en paralelo. Cada JAR espera a que terminen los JARs anteriores que definen los módulos
+        # que requiere, ya que deben estar en el --module-path al compilar su descriptor (o ser omitido si fallaron)
+        tasks = []
+        jobs_by_module_name = {}
+        for artifact, file in jobs:
+            module = artifact.get_module()
+            dependencies = []
+            for module_name in module.get_requires_modules() or []:
+                dependencies.extend(jobs_by_module_name.get(module_name, []))
+
+            tasks.append((lambda a=artifact, f=file: modularize(a, f), dependencies,
+                          self.__get_disk_usage(artifact, file),
+                          self.__build_remote_modules_check(artifact, file, failed_modules)))
+            jobs_by_module_name.setdefault(module.get_name(), []).append(len(tasks) - 1)
+
+        if self.__shard is not None:
+            # Reemplaza el reporte de una ejecución anterior, para que los demás fragmentos no lo tomen por el actual
+            index, count = self.__shard
+            self.__shard_report = ShardReport(index, count, self.__plan.get_descriptor_hash(),
+                                              [a.get_name() for a, f in jobs], self.__modularized_artifacts)
+            self.__shard_report.save(self.__destination_dir)
+
+        return tasks
+
+    def __get_remote_failed_modules(self, all_jobs):
+        """
+        Los artefactos de otros fragmentos (shards) con problemas propios nunca serán modularizados, por lo que sus
+        dependientes de este fragmento no deben esperar por ellos. Lo mismo ocurre con los que dependen de estos, salvo
+        que se haya especificado 'keep_going'.
 
-        # Modularizar cada uno de los JARs
-        for artifact in self.__artifact_list:
-            for file in self.__jar_files_list:
-                if file.name == artifact.get_name():
-                    if not self.__modularize_jar(file, artifact):
-                        self.__count_error_founds += 1
-                    break
+        :param all_jobs: Lista de tuplas (artefacto, archivo JAR) de todos los fragmentos, en orden de modularización.
+        :return: Diccionario nombre del módulo->nombre del JAR causante del fallo con los módulos de otros fragmentos
+                 que no podrán ser modularizados.
+        """
+        failed_modules = {}
+        for artifact, file in all_jobs:
+            module = artifact.get_module()
+            if self.__remote_modules.get(module.get_name(), (None,))[0] != artifact.get_name():
+                continue
 
-    def __sort_artifacts(self):
+            failure_cause = None
+            if self.__analyzer.get_problems(artifact) is not None:
+                failure_cause = file.name
+            elif not self.__keep_going:
+                failure_cause = next((failed_modules[m] for m in module.get_requires_modules() or []
+                                      if m in failed_modules), None)
+
+            if failure_cause is not None:
+                failed_modules.setdefault(module.get_name(), failure_cause)
+
+        return failed_modules
+
+    def __load_remote_report(self, index):
         """
-        Ordena artefactos definidos en el descriptor de modularización teniendo en cuenta las dependencias entre ellos.
-        Aquellos artefactos que menos niveles de dependencias tengan terminarán siendo primeros que aquellos que más niveles
-        dependencias tengan.
+        Lee el reporte del fragmento 'index'. Para no leerlo una vez por cada JAR que espera, el reporte leído se
+        reutiliza durante POLL_INTERVAL segundos.
 
-        Cuando hablamos de niveles de dependencias nos referimos a que si el artefacto A depende de B y este a su vez
-        depende de C, primero irá C, luego B y por último A.
+        :return: Tupla (reporte o None si no existe o corresponde a otro descriptor, set con los nombres de los
+                 artefactos modularizados por el fragmento).
+        """
+        loaded = self.__remote_reports.get(index)
+        if loaded is None or time.time() - loaded[0] >= POLL_INTERVAL:
+            report = ShardReport.load(self.__destination_dir, index, self.__shard[1])
+            if report is not None and report.get_descriptor_hash() != self.__plan.get_descriptor_hash():
+                report = None
 
-        Es importante aclarar que las únicas dependencias que cuentan para los fines explicados arriba son aquellas que
-        hacen referncia a los módulos que deseamos crear (aquellos cuya definición está declarada en el descriptor de
-        modularización), nunca las que referencian a terceros módulos ya existentes.
+            loaded = (time.time(), report, set(report.get_modularized()) if report is not None else set())
+            self.__remote_reports[index] = loaded
+
+        return loaded[1], loaded[2]
 
-        Los artefectos ordenados serán agregados a self.__artifact_list.
-
-        ImplNote: Para lograr este orden se agregan cada unos de los artefactos contenidos en self.__artifact_set
-                  en un árbol de dependencias, quedando en los niveles superiores aquellos que más niveles de dependencias
-                  tengan.
-        """
-
-        # Crear el árbol de dependencias con una raíz ficticia ya que no contiene datos. Esto
-        # se hace para que todos los nodos con la misma profundidad en su decendencia se encuentren
-        # al mismo nivel
-        dependencies_tree = Tree(TreeNode(Artifact()))
-
-        for artifact in self.__artifact_set:
-            # Busco si en el árbol ya existe un artefacto que defina el mismo módulo que el
-            # artefacto analizado. Si esto ocurre es porque se trata del mismo artefacto.
-            artifact_node = dependencies_tree.find_node_by_data(artifact, Modularizer.__equals_artifact_by_module_name)
-
-            # Si no es parte del árbol de dependencias creo un nuevo nodo
-            if artifact_node is None:
-                artifact_node = TreeNode(artifact)
-                # Lo agrego como hijo de la raíz
-                dependencies_tree.get_root().get_children().append(artifact_node)
-
-            # Esto es un truco para poder utilizar la referencia artifactNode dentro de expresiones lambda
-            # puesto que al no ser final o efectivamente final me lanza error
-            # artifactNodeReference = AtomicReference<>(artifactNode)
-
-            # Agregar como hijos los módulos de los que depende el artefacto actual y
-            # que se encuentran definidos cómo módulos por otros artefactos
-            requires_modules = artifact.get_module().get_requires_modules()
-            if requires_modules is not None:
-                for module_name in requires_modules:
-                    # Busco si el módulo requerido es definido por alguno de los artefactos
-                    module_founds = [a for a in self.__artifact_set if a.get_module().get_name() == module_name]
-                    # Si encuentro el artefacto que lo define...
-                    if len(module_founds) > 0:
-                        # Tomo el primero encontrado
-                        a = module_founds[0]
-                        # Busco si el artefacto ya existe en el árbol de dependencias
-                        require_module_node = dependencies_tree.find_node_by_data(a,
-                                                                                  Modularizer.__equals_artifact_by_module_name)
-
-                        if require_module_node is None:
-                            # Si no existe agrego el artefacto encontrado como hijo del artefacto actual
-                            artifact_node.get_children().append(TreeNode(a))
-                        else:
-                            # Si ya existe en el árbol...
-                            current_artifact_level = dependencies_tree.get_node_level(artifact_node)
-                            required_artifact_level = dependencies_tree.get_node_level(require_module_node)
-
-                            # Si el nivel en que se encuentra el artefacto requerido es menor o igual
-                            # que el nivel donde se encuentra el artefacto actual, se lo quito al padre
-                            # y lo agrego como hijo del artefacto actual.
-                            # En caso contrario no es necesario hacerlo ya que si el nivel del requerido
-                            # es mayor, este será modularizado antes
-                            if required_artifact_level <= current_artifact_level:
-                                dependencies_tree.remove_subtree(require_module_node)
-                                artifact_node.get_children().append(require_module_node)
-
-        # Obtener el listado de ordenado de los artefactos según deben ser modularizados
-        # Los primeros deben ser los que se hayan en el nivel más profundo
-        tree_level = dependencies_tree.get_tree_level()
-        i = tree_level
-        while i > 0:
-            nodes_at_level = dependencies_tree.get_nodes_at_level(i)
-            for item in nodes_at_level:
-                self.__artifact_list.append(item.get_data())
-            i -= 1
+    def __get_remote_module_state(self, module_name):
+        """
+        Consulta el estado de un módulo requerido asignado a otro fragmento (shard) según el reporte de dicho fragmento
+        para el descriptor actual (ver ShardReport). No basta con que su JAR modularizado exista en el directorio de
+        destino compartido, ya que puede haber quedado de una ejecución anterior.
+
+        :return: Tupla (terminado, nombre del JAR causante del fallo o None).
+        """
+        with self.__lock:
+            state = self.__remote_module_states.get(module_name)
+            if state is not None:
+                return state
+
+            artifact_name, index = self.__remote_modules[module_name]
+            report, modularized = self.__load_remote_report(index)
+            state = (False, None)
+            if report is not None:
+                if artifact_name in modularized:
+                    state = (True, None)
+                elif artifact_name in report.get_failed():
+                    state = (True, report.get_failed()[artifact_name])
+
+            # El estado de un módulo terminado no cambia durante la ejecución
+            if state[0]:
+                self.__remote_module_states[module_name] = state
+
+            return state
+
+    def __get_remote_failure_cause(self, module):
+        """
+        :return: Nombre del JAR causante del fallo de alguno de los módulos requeridos por 'module' asignados a otros
+                 fragmentos o None si ninguno falló.
+        """
+        for module_name in module.get_requires_modules() or []:
+            if module_name in self.__remote_modules:
+                failure_cause = self.__get_remote_module_state(module_name)[1]
+                if failure_cause is not None:
+                    return failure_cause
+
+        return None
+
+    def __build_remote_modules_check(self, artifact, file, failed_modules):
+        """
+        Un JAR cuyo descriptor debe ser compilado no puede iniciarse hasta que los módulos que requiere y que fueron
+        asignados a otros fragmentos estén en el directorio de destino compartido (o hayan fallado), ya que javac los
+        necesita en el --module-path. Si el descriptor compilado se encuentra en la caché no es necesario esperar.
+
+        :param failed_modules: Módulos que no podrán ser modularizados (ver __get_remote_failed_modules()). No se
+                               espera por ellos.
+        :return: Función que indica si el JAR puede comenzar a modularizarse o None si no necesita esperar.
+        """
+        module = artifact.get_module()
+        remote_module_names = [m for m in module.get_requires_modules() or []
+                               if m in self.__remote_modules and m not in failed_modules]
+        if len(remote_module_names) == 0 or self.__is_automatic(artifact) or \
+                self.__analyzer.get_problems(artifact) is not None:
+            return None
+
+        # Solo este fragmento compila el descriptor del módulo, por lo que basta con consultar la caché una vez
+        if self.__cache is not None:
+            module_info_data = self.__cache.get(self.__get_cache_key(artifact, file))
+            self.__prefetched_module_info[artifact.get_name()] = module_info_data
+            if module_info_data is not None:
+                return None
+
+        deadline = time.time() + self.__shard_timeout
+
+        def check():
+            pending = [m for m in remote_module_names if not self.__get_remote_module_state(m)[0]]
+            if len(pending) > 0 and time.time() > deadline:
+                print("[WARN] Timeout waiting for modules " + ", ".join(["'" + m + "'" for m in pending]) +
+                      " required by '" + file.name + "' from other shards")
+                return True
+
+            return len(pending) == 0
+
+        return check
+
+    def __save_shard_report(self, artifact, failure_cause):
+        with self.__lock:
+            if failure_cause is not None:
+                self.__shard_report.get_failed()[artifact.get_name()] = failure_cause
+
+            try:
+                self.__shard_report.save(self.__destination_dir)
+            except Exception as e:
+                print("[WARN] Error saving shard report. " + str(e))
+
+    def __get_work_dir(self):
+        """
+        :return: Directorio donde se extraen los JARs. Cada fragmento (--shard) tiene el suyo, ya que al terminar lo
+                 elimina mientras los demás pueden seguir utilizando el propio.
+        """
+        if self.__shard is None:
+            return self.__destination_dir / WORK_DIR_NAME
+
+        index, count = self.__shard
+        return self.__destination_dir / (WORK_DIR_NAME + "-" + str(index) + "-of-" + str(count))
 
     @classmethod
-    def __equals_artifact_by_module_name(cls, a1, a2):
-        if a1.get_module() is not None and a2.get_module() is not None:
-            return a1.get_module().get_name() == a2.get_module().get_name()
+    def build_executor(cls, jobs, destination_dirs):
+        """
+        :param jobs: Cantidad de JARs a modularizar simultáneamente o None para calcularla a partir de las CPUs y la
+                     memoria disponibles (ver ResourceProbe).
+        :param destination_dirs: Directorios de destino de los JARs modularizados. El presupuesto de espacio en disco es
+                                 el menor de los de todos ellos.
+        :return: Ejecutor de la modularización.
+        """
+        workers = jobs if jobs is not None else ResourceProbe.compute_worker_count()
+        disk_budgets = [b for b in map(ResourceProbe.get_disk_budget, destination_dirs) if b is not None]
+        disk_budget = min(disk_budgets) if len(disk_budgets) > 0 else None
 
-        return False
+        print("[INFO] Modularizing up to " + str(workers) + " JAR files at a time" +
+              (" (disk budget " + str(disk_budget // (1024 * 1024)) + " MiB)" if disk_budget is not None else ""))
+        print()
+
+        return ParallelExecutor(workers, disk_budget)
+
+    def __get_disk_usage(self, artifact, file):
+        """
+        :return: Tupla (espacio temporal, espacio permanente) en disco que ocupará la modularización del JAR 'file' (ver
+                 ResourceProbe.get_jar_disk_usage()). Los módulos automáticos no necesitan extraer el JAR.
+        """
+        try:
+            return ResourceProbe.get_jar_disk_usage(file, not self.__is_automatic(artifact))
+        except Exception:
+            # Los errores de lectura del JAR se reportan al modularizarlo
+            return 0, 0
+
+    def __add_modularized(self, artifact):
+        with self.__lock:
+            self.__count_modularized += 1
+            self.__modularized_artifacts.append(artifact.get_name())
+
+    def __add_error(self):
+        with self.__lock:
+            self.__count_error_founds += 1
+
+    def __select_shard_jobs(self, jobs):
+        """
+        Divide los artefactos en fragmentos (ver ShardPartitioner) y devuelve solo los del fragmento a modularizar.
+
+        :param jobs: Lista de tuplas (artefacto, archivo JAR).
+        :return: Lista de tuplas (artefacto, archivo JAR) del fragmento self.__shard.
+        """
+        index, count = self.__shard
+        weights = {a.get_name(): f.stat().st_size for a, f in jobs}
+        levels = {a.get_name(): self.__plan.get_level(a) for a, f in jobs}
+        shards = ShardPartitioner.partition([a for a, f in jobs], weights, levels, count)
+
+        shard_artifacts = set(shards[index - 1])
+        shard_jobs = [(a, f) for a, f in jobs if a in shard_artifacts]
+
+        for i, shard in enumerate(shards):
+            if i != index - 1:
+                for artifact in shard:
+                    self.__remote_modules.setdefault(artifact.get_module().get_name(), (artifact.get_name(), i + 1))
+
+        shard_weight = sum(weights[a.get_name()] for a, f in shard_jobs)
+        total_weight = sum(weights.values())
+        print("[INFO] Shard " + str(index) + "/" + str(count) + ": " + str(len(shard_jobs)) + " of " + str(len(jobs)) +
+              " JARs (" + str(shard_weight) + " of " + str(total_weight) + " bytes)")
+        print()
+
+        return shard_jobs
+
+    def verify_shards(self, count):
+        """
+        Verifica que los 'count' fragmentos (shards) en que se dividió la modularización terminaron y que entre todos
+        modularizaron todos los JARs. Cada fragmento deja su reporte en el directorio de destino (ver ShardReport), por
+        lo que todos ellos deben haber utilizado el mismo directorio de destino (o sus reportes deben ser copiados a
+        este antes de la verificación).
+
+        :return: True si todos los JARs fueron modularizados, False en caso contrario.
+        :exception ParseException: Si ocurrió algún error deserializando el archivo descriptor de modularización
+        """
+        print()
+        print("Verifying " + str(count) + " shards...")
+        print("--------------------------------------------------------------------")
+        print()
+
+        self.__load_plan()
+
+        jar_names = {f.name for f in self.__source_dir.iterdir() if f.is_file() and f.suffix == ".jar"}
+        expected = [a.get_name() for a in self.__artifact_list if a.get_name() in jar_names]
+
+        assigned = {}
+        for index in range(1, count + 1):
+            shard_str = str(index) + "/" + str(count)
+            report = ShardReport.load(self.__destination_dir, index, count)
+            if report is None:
+                print("[ERROR] Shard " + shard_str + " has not finished. Report not found.")
+                self.__count_error_founds += 1
+                continue
+
+            if not report.is_finished():
+                print("[ERROR] Shard " + shard_str + " has not finished")
+                self.__count_error_founds += 1
+                continue
+
+            if report.get_descriptor_hash() != self.__plan.get_descriptor_hash():
+                print("[ERROR] Shard " + shard_str + " was run with a different modularization descriptor")
+                self.__count_error_founds += 1
+                continue
+
+            modularized = set(report.get_modularized())
+            for name in report.get_artifacts():
+                if name in assigned:
+                    print("[ERROR] '" + name + "' was processed by shards " + str(assigned[name]) + " and " + str(index))
+                    self.__count_error_founds += 1
+                    continue
+
+                assigned[name] = index
+                if name not in modularized:
+                    print("[ERROR] '" + name + "' was not modularized by shard " + shard_str)
+                    self.__count_error_founds += 1
+                elif not (self.__destination_dir / (name + "-mod.jar")).is_file():
+                    print("[ERROR] '" + name + "' was modularized by shard " + shard_str + " but '" + name +
+                          "-mod.jar' not found")
+                    self.__count_error_founds += 1
+                else:
+                    self.__count_modularized += 1
+
+        for name in expected:
+            if name not in assigned:
+                print("[ERROR] '" + name + "' was not processed by any shard")
+                self.__count_error_founds += 1
+
+        return self.__count_error_founds == 0
+
+    def __is_automatic(self, artifact):
+        """
+        Permite conocer si el artefacto debe convertirse en un módulo automático en lugar de en un módulo explícito.
+        Esto ocurre si fue marcado como tal en el descriptor de modularización ('automatic': true) o si está activado
+        el modo de módulos automáticos y el artefacto no define 'exportsPackages' ni 'requiresModules'.
+        """
+        module = artifact.get_module()
+        if module.is_automatic():
+            return True
+
+        return self.__automatic_modules and module.get_exports_packages() is None and \
+            module.get_requires_modules() is None
+
+    def __analyze_packages(self, jobs, reported_jobs):
+        """
+        Construye el índice global paquete->artefacto a partir del directorio central de cada uno de los JARs a
+        modularizar y reporta los paquetes divididos y las exportaciones inválidas antes de cualquier compilación.
+
+        :param jobs: Lista de tuplas (artefacto, archivo JAR) con todos los JARs a analizar.
+        :param reported_jobs: Lista de tuplas (artefacto, archivo JAR) cuyos problemas se deben reportar (los del
+                              fragmento a modularizar).
+        """
+        for artifact, file in jobs:
+            try:
+                # Si el JAR no cambió desde la ejecución anterior sus paquetes se toman del plan
+                jar_packages = self.__plan.get_jar_packages(artifact, file)
+                if jar_packages is None:
+                    with zipfile.ZipFile(file, "r") as jar_file:
+                        has_module_descriptor = len([m for m in jar_file.namelist() if
+                                                     m.endswith("module-info.class")]) > 0
+                        jar_packages = PreflightAnalyzer.index_packages(jar_file) + (has_module_descriptor,)
+                        self.__plan.set_jar_packages(artifact, file, *jar_packages)
+
+                packages, notes, problems, has_module_descriptor = jar_packages
+                if has_module_descriptor:
+                    self.__analyzer.add_problem(artifact, "JAR file contains al least one module definition.")
+
+                self.__analyzer.add_artifact(artifact, packages, notes, problems)
+            except Exception as e:
+                self.__analyzer.add_problem(artifact, "Error reading JAR file. " + str(e))
+
+        for warning in self.__analyzer.analyze():
+            print("[WARN] " + warning)
+
+        for artifact, file in reported_jobs:
+            problems = self.__analyzer.get_problems(artifact)
+            if problems is not None:
+                for problem in problems:
+                    print("[ERROR] '" + file.name + "' will not be modularized. " + problem)
+
+        print()
+
+    def __sort_artifacts(self):
+        """
+        Ordena los artefactos definidos en el descriptor de modularización teniendo en cuenta las dependencias entre
+        ellos (ver DependencyPlanner.sort()). Los artefactos ordenados serán agregados a self.__artifact_list.
+
+        :return: Diccionario nombre de artefacto->nivel, donde los artefactos del nivel 0 son los primeros en ser
+                 modularizados.
+        """
+        self.__artifact_list, levels = DependencyPlanner.sort(self.__artifact_set)
+        return levels
 
     def __modularize_jar(self, file, artifact):
         """
@@ -260,68 +704,71 @@ class Modularizer:
 
         temp_artifact_dir = None
         jar_file = None
+        key_lock = None
 
         try:
             jar_file = zipfile.ZipFile(file, "r")
 
-            temp_artifact_dir = self.__destination_dir / (file.name + "-temp")
-            try:
-                temp_artifact_dir.mkdir(parents=True, exist_ok=True)
-            except Exception as e:
-                raise RuntimeError("Can not create temp dir '" + temp_artifact_dir + "'. " + str(e))
-
             # Validar que el jar no tenga al menos una definición de módulo
             if len([m for m in jar_file.namelist() if m.endswith("module-info.class")]) > 0:
                 raise RuntimeError("JAR file contains al least one module definition.")
 
-            # Extraer el contenido del archivo JAR
-            # OJO: No se puede utilizar ZipFile.extractall() porque falla en Windows si la longitud de la ruta del
-            #      archivo a crear es mayor que el límite definido por el sistema operativo
-            for entry_path in jar_file.namelist():
-                try:
-                    jar_file.extract(member=entry_path, path=temp_artifact_dir)
-                except FileNotFoundError as e:
-                    # Si el mensaje de error inicia con '[Errno 2] No such file or directory: ' seguramente el error
-                    # está relacionado con la longitud de la ruta del archivo a crear.
-                    # Esto puede causar que no se pueda compilar el descriptor del módulo si este error impidió que
-                    # se creara alguno de los paquetes que son exportados
-                    if str(e).startswith("[Errno 2] No such file or directory: "):
-                        path_err = str(e).replace("[Errno 2] No such file or directory: ", "")
-                        print("[WARN] Was not possible to extract the JAR's entry with de following path: " + path_err)
-                        print("[WARN] Maybe JAR file '" + file.name + "' can not be modularized.")
-                    else:
-                        raise e
-
-            # Obtener todos los paquetes que contengan al menos un archivo .class
-            # lo meto en un set para evitar duplicados
-            non_empty_packages = set()
-            for entry_path in [entry for entry in jar_file.namelist() if
-                               not jar_file.getinfo(entry).is_dir() and entry.endswith(".class")]:
-                last_slash_index = entry_path.rfind('/')
-                non_empty_packages.add(entry_path[0:last_slash_index].replace("/", "."))
-
-            # Generar el archivo module-info.class
+            module_descriptor_source = self.__get_module_descriptor_source(artifact, file)
+
+            # Si el descriptor compilado ya se encuentra en la caché no es necesario extraer el JAR ni compilar. La
+            # caché pudo ser consultada antes de iniciar la modularización (ver __build_remote_modules_check())
+            cache_key = None
             module_info_data = None
-            try:
-                module_info_data = self.__generate_module_descriptor(temp_artifact_dir, artifact.get_module(),
-                                                                     non_empty_packages)
-            except IOError as e:
-                raise IOError("Error generating module descriptor. " + str(e))
+            if self.__cache is not None:
+                cache_key = self.__get_cache_key(artifact, file)
+                if artifact.get_name() in self.__prefetched_module_info:
+                    module_info_data = self.__prefetched_module_info.pop(artifact.get_name())
+                else:
+                    # Si otro hilo (por ejemplo, de otro trabajo del lote) está compilando el mismo descriptor se espera
+                    # a que termine para tomarlo de la caché
+                    key_lock = self.__cache.get_key_lock(cache_key)
+                    key_lock.acquire()
+                    module_info_data = self.__cache.get(cache_key)
+
+            from_cache = module_info_data is not None
+            if not from_cache:
+                temp_artifact_dir = self.__get_work_dir() / (file.name + "-temp")
+                try:
+                    temp_artifact_dir.mkdir(parents=True, exist_ok=True)
+                except Exception as e:
+                    raise RuntimeError("Can not create temp dir '" + str(temp_artifact_dir) + "'. " + str(e))
 
-            if module_info_data is None:
-                raise RuntimeError("Can not to compile module-info.java")
+                for path_err in JarPatcher.extract(jar_file, temp_artifact_dir):
+                    print("[WARN] Was not possible to extract the JAR's entry with de following path: " + path_err)
+                    print("[WARN] Maybe JAR file '" + file.name + "' can not be modularized.")
+
+                # Generar el archivo module-info.class
+                try:
+                    module_info_data = self.__generate_module_descriptor(temp_artifact_dir, module_descriptor_source)
+                except IOError as e:
+                    raise IOError("Error generating module descriptor. " + str(e))
+
+                if module_info_data is None:
+                    raise RuntimeError("Can not to compile module-info.java")
+
+                if self.__cache is not None:
+                    self.__cache.put(cache_key, module_info_data)
 
             # Agregar el descriptor del módulo al JAR
             self._patch_jar(file, module_info_data)
 
-            print("[INFO] '" + file.name + "' modularized to module '" + artifact.get_module().get_name() + "'")
-            self.__count_modularized += 1
+            print("[INFO] '" + file.name + "' modularized to module '" + artifact.get_module().get_name() + "'" +
+                  (" (cached)" if from_cache else ""))
+            self.__add_modularized(artifact)
             return True
         except IOError as e:
             print("[ERROR] I/O error modularizing JAR file '" + file.name + "'. " + str(e))
         except Exception as e:
             print("[ERROR] Unexpected error modularizing JAR file '" + file.name + "'. " + str(e))
         finally:
+            if key_lock is not None:
+                key_lock.release()
+
             if jar_file is not None:
                 jar_file.close()
 
@@ -333,6 +780,53 @@ class Modularizer:
 
         return False
 
+    def __get_module_descriptor_source(self, artifact, file):
+        """
+        :return: Contenido del descriptor del módulo (module-info.java) del JAR 'file'. Se toma del plan si fue creado
+                 en una ejecución anterior.
+        """
+        module_descriptor_source = self.__plan.get_module_descriptor_source(artifact, file)
+        if module_descriptor_source is None:
+            # Los paquetes que contienen al menos un archivo .class ya fueron obtenidos durante el análisis previo
+            module_descriptor_source = Modularizer.build_module_descriptor_source(artifact.get_module(),
+                                                                             self.__analyzer.get_packages(artifact))
+            self.__plan.set_module_descriptor_source(artifact, file, module_descriptor_source)
+
+        return module_descriptor_source
+
+    def __get_cache_key(self, artifact, file):
+        return ModuleCache.compute_key(file, self.__get_module_descriptor_source(artifact, file),
+                                       self.__compiler.get_jdk_fingerprint())
+
+    def __modularize_jar_as_automatic(self, file, artifact):
+        """
+        Convierte el archivo JAR :file en un módulo automático agregando el atributo 'Automatic-Module-Name' al
+        manifiesto. No es necesario extraer el JAR ni compilar nada.
+
+        :param file: Ruta al archivo JAR a modularizar.
+        :param artifact: Objeto que contiene los datos de la entrada correspondiente al archivo JAR en el descriptor de
+                         modularización.
+
+        :return True si la modularización se completó satisfactoriamente, False en caso contrario.
+        """
+        module = artifact.get_module()
+        if module.get_exports_packages() is not None or module.get_requires_modules() is not None:
+            print("[WARN] 'exportsPackages' and 'requiresModules' are ignored for automatic module '" +
+                  module.get_name() + "'")
+
+        try:
+            self._patch_jar_manifest(file, module.get_name())
+
+            print("[INFO] '" + file.name + "' modularized to automatic module '" + module.get_name() + "'")
+            self.__add_modularized(artifact)
+            return True
+        except IOError as e:
+            print("[ERROR] I/O error modularizing JAR file '" + file.name + "'. " + str(e))
+        except Exception as e:
+            print("[ERROR] Unexpected error modularizing JAR file '" + file.name + "'. " + str(e))
+
+        return False
+
     def __recursive_remove(self, path):
         try:
             if path.is_dir():
@@ -345,41 +839,23 @@ class Modularizer:
         except:
             raise RuntimeError("Can not remove " + ("file " if path.is_file() else "directory ") + path.resolve())
 
-    def __generate_module_descriptor(self, output_dir, module, jar_non_empty_packages):
+    @classmethod
+    def build_module_descriptor_source(cls, module, jar_non_empty_packages):
         """
-        Genera el descriptor del módulo 'module' en el directorio definido por 'output_dir'.
-
-        El proceso inicia creando la definición del descriptor del módulo, un archivo module-info.java. Para agregar las
-        directivas 'exports' se utiliza la definición hecha en el descriptor de modularización. Si dicha definición no
-        fue hecha entonces se agregará una directiva 'exports' para todos los paquetes del JAR original que contengan
-        al menos un archivo '.class'. Para agregar las directivas 'requires' se utilizará la definición hecha en el
-        descriptor de modularización y en caso de no existir no se agregará ninguna directiva de este tipo.
+        Crea el contenido del descriptor del módulo 'module' (archivo module-info.java).
 
-        Una vez creado el descriptor del módulo (archivo module-info.java) este es compilado utilido el jdk sobre el
-        cual se está ejecutando este programa.
-
-        El proceso de compilación puede fallar si los módulos de los cuales depende este módulo (según las directivas
-        'requires' definidas) no son visibles por el compilador. Por defecto se agrega al comando de compilación el
-        parámetro '--module-path <destDir>', donde 'destDir' es el directorio donde se depositarán los nuevos JARs
-        modularizados, el cual fue definido utilizando parámetro '--dest' de este programa. Esto nos asegura que si
-        el modulo que estamos modularizando actualmente depende de algún otro módulo que vamos a modularizar, este sea
-        visible para el compilador (esto requiere que primero se modularice el módulo del cual se depende y luego se
-        modularice este). Si adicionalmente el módulo a modularizar depende de otros ya existentes se puede utilizar
-        el parámetro '--module-path' al ejecutar la aplicación para agregar cualquier otro directorio y/o archivos
-        (este parámetro tiene la misma sintaxis del homónimo en 'java', 'javac', 'jlink' y demás herramientas del JDK).
+        Para agregar las directivas 'exports' se utiliza la definición hecha en el descriptor de modularización. Si dicha
+        definición no fue hecha entonces se agregará una directiva 'exports' para todos los paquetes del JAR original que
+        contengan al menos un archivo '.class'. Para agregar las directivas 'requires' se utilizará la definición hecha
+        en el descriptor de modularización y en caso de no existir no se agregará ninguna directiva de este tipo.
 
-        :param output_dir: Directorio en donde se debe generar el archivo module-info.java. Debe ser el directorio raíz en
-                         el cual se extrajo el contenido del archivo JAR a modularizar.
         :param module: Objeto con la definición del módulo.
         :param jar_non_empty_packages: Listado de los paquetes contenidos en el archivo JAR que al menos contiene una archivo
                                    .class. Si 'module.exportsPackages == null' se agregará una entrada del tipo
                                    'exports package.name' para cada uno de los elementos de este listado.
 
-        :return: Cotenido del archivo module-info.class correspondiente al archivo module-info.java compilado.
-
-        :except IOError: Si ocurre un error escribiendo el archivo module-info.java en el disco duro.
+        :return: Contenido del archivo module-info.java.
         """
-
         # Crear el contenido del descriptor
         module_descriptor = ["module ", module.get_name(), " {", os.linesep]
 
@@ -391,14 +867,16 @@ class Modularizer:
         if module.get_exports_packages() is not None:
             final_packages_list = module.get_exports_packages()
 
-        for p in final_packages_list:
+        # Las directivas se ordenan (y se eliminan los duplicados) para que el contenido del descriptor, y por tanto el
+        # module-info.class generado y su llave en la caché, no dependa del orden de iteración ni del de la definición
+        for p in sorted(set(final_packages_list)):
             module_descriptor.append("    exports ")
             module_descriptor.append(p)
             module_descriptor.append(";")
             module_descriptor.append(os.linesep)
 
         if module.get_requires_modules() is not None:
-            for m in module.get_requires_modules():
+            for m in sorted(set(module.get_requires_modules())):
                 module_descriptor.append("    requires ")
                 module_descriptor.append(m)
                 module_descriptor.append(";")
@@ -406,9 +884,40 @@ class Modularizer:
 
         module_descriptor.append("}")
 
+        return "".join(module_descriptor)
+
+    def __generate_module_descriptor(self, output_dir, module_descriptor_source):
+        """
+        Genera y compila el descriptor del módulo en el directorio definido por 'output_dir'.
+
+        El proceso inicia escribiendo la definición del descriptor del módulo, un archivo module-info.java, cuyo contenido
+        es 'module_descriptor_source' (ver build_module_descriptor_source()).
+
+        Una vez creado el descriptor del módulo (archivo module-info.java) este es compilado utilido el jdk sobre el
+        cual se está ejecutando este programa.
+
+        El proceso de compilación puede fallar si los módulos de los cuales depende este módulo (según las directivas
+        'requires' definidas) no son visibles por el compilador. Por defecto se agrega al comando de compilación el
+        parámetro '--module-path <destDir>', donde 'destDir' es el directorio donde se depositarán los nuevos JARs
+        modularizados, el cual fue definido utilizando parámetro '--dest' de este programa. Esto nos asegura que si
+        el modulo que estamos modularizando actualmente depende de algún otro módulo que vamos a modularizar, este sea
+        visible para el compilador (esto requiere que primero se modularice el módulo del cual se depende y luego se
+        modularice este). Si adicionalmente el módulo a modularizar depende de otros ya existentes se puede utilizar
+        el parámetro '--module-path' al ejecutar la aplicación para agregar cualquier otro directorio y/o archivos
+        (este parámetro tiene la misma sintaxis del homónimo en 'java', 'javac', 'jlink' y demás herramientas del JDK).
+
+        :param output_dir: Directorio en donde se debe generar el archivo module-info.java. Debe ser el directorio raíz en
+                         el cual se extrajo el contenido del archivo JAR a modularizar.
+        :param module_descriptor_source: Contenido del archivo module-info.java.
+
+        :return: Cotenido del archivo module-info.class correspondiente al archivo module-info.java compilado.
+
+        :except IOError: Si ocurre un error escribiendo el archivo module-info.java en el disco duro.
+        """
+
         # Escribir el descriptor en el disco duro
         try:
-            (output_dir / "module-info.java").write_text("".join(module_descriptor))
+            (output_dir / "module-info.java").write_text(module_descriptor_source)
         except:
             raise
 
@@ -439,17 +948,35 @@ class Modularizer:
         :param jar_file_path: Archivo JAR a parchar
         :param module_descriptor_data: Contenido de la entrada /module-info.class
         """
-        mod_jar_file = None
         try:
-            # Hago una copia exacta del JAR
-            mod_jar_file_path = self.__destination_dir / (jar_file_path.name + "-mod.jar")
-            mod_jar_file_path.write_bytes(jar_file_path.read_bytes())
-
-            # Agrego a la copia del archivo JAR original el descriptor del módulo
-            mod_jar_file = zipfile.ZipFile(mod_jar_file_path, mode="a")
-            mod_jar_file.writestr("module-info.class", module_descriptor_data)
+            self.__write_mod_jar(jar_file_path, lambda target: JarPatcher.add_module_descriptor(
+                jar_file_path, target, module_descriptor_data, self.__reproducible))
         except Exception as e:
-            RuntimeError("Error to patching original jar file. " + str(e))
+            raise RuntimeError("Error to patching original jar file. " + str(e))
+
+    def _patch_jar_manifest(self, jar_file_path, module_name):
+        """
+        Crea la copia modularizada del archivo JAR cuya ruta es 'jar_file_path' agregando al manifiesto el atributo
+        'Automatic-Module-Name: module_name' (ver JarPatcher.add_automatic_module_name()).
+
+        :param jar_file_path: Archivo JAR a parchar
+        :param module_name: Nombre del módulo automático
+        """
+        self.__write_mod_jar(jar_file_path, lambda target: JarPatcher.add_automatic_module_name(
+            jar_file_path, target, module_name, self.__reproducible))
+
+    def __write_mod_jar(self, jar_file_path, write):
+        """
+        Crea el JAR modularizado correspondiente al archivo JAR 'jar_file_path' utilizando la función 'write', la cual
+        recibe la ruta del archivo a crear. El JAR se escribe primero en un archivo temporal que se renombra al
+        terminar, para que javac nunca encuentre en el --module-path un JAR incompleto mientras se modularizan otros
+        JARs.
+        """
+        mod_jar_file_path = self.__destination_dir / (jar_file_path.name + "-mod.jar")
+        partial_file_path = self.__destination_dir / (mod_jar_file_path.name + ".part")
+        try:
+            write(partial_file_path)
+            os.replace(str(partial_file_path), str(mod_jar_file_path))
         finally:
-            if mod_jar_file is not None:
-                mod_jar_file.close()
+            if partial_file_path.exists():
+                partial_file_path.unlink()
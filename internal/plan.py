@@ -0,0 +1,211 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from pathlib import Path
+import hashlib
+import json
+import os
+import tempfile
+
+from .entity import Artifact
+
+# Nombre del archivo, dentro del directorio de destino, donde se guarda el plan de modularización
+PLAN_FILE_NAME = ".jarmod-plan"
+
+# Versión del formato del plan. Debe cambiarse si cambia su contenido o la forma en que se generan los descriptores de
+# los módulos para que los planes guardados por versiones anteriores sean descartados
+PLAN_FORMAT_VERSION = 1
+
+
+class BuildPlan:
+    """
+    Plan de modularización resuelto a partir de un descriptor de modularización. Contiene los artefactos ya
+    deserializados, el índice nombre de módulo->artefacto, el orden en que deben ser modularizados (junto con el nivel
+    de cada uno de ellos) y, para cada JAR, sus paquetes no vacíos y el código fuente de su descriptor de módulo.
+
+    El plan se guarda en el directorio de destino en formato JSON (nunca se deserializan objetos arbitrarios, ya que el
+    directorio de destino puede ser compartido por varias máquinas) y se identifica por la huella (sha256) del
+    descriptor de modularización, por lo que mientras este no cambie las siguientes ejecuciones no necesitan volver a
+    deserializarlo ni ordenar los artefactos. La información de cada JAR se identifica además por el tamaño y la fecha
+    de modificación del archivo, por lo que es descartada si el JAR cambia.
+    """
+
+    def __init__(self, descriptor_hash, artifacts, levels):
+        """
+        :param descriptor_hash: Huella del descriptor de modularización (ver compute_descriptor_hash()).
+        :param artifacts: Lista de artefactos en el orden en que deben ser modularizados.
+        :param levels: Diccionario nombre de artefacto->nivel. Los artefactos del nivel 0 son los primeros en ser
+                       modularizados.
+        """
+        self.__descriptor_hash = descriptor_hash
+        self.__artifacts = artifacts
+        self.__levels = levels
+        self.__module_index = {}
+        for artifact in artifacts:
+            self.__module_index.setdefault(artifact.get_module().get_name(), artifact)
+        self.__jars = {}
+        self.__modified = True
+
+    @classmethod
+    def compute_descriptor_hash(cls, descriptor_data):
+        return hashlib.sha256(descriptor_data).hexdigest()
+
+    @classmethod
+    def load(cls, plan_file: Path, descriptor_hash):
+        """
+        Carga el plan guardado en 'plan_file'.
+
+        :return: El plan cargado o None si no existe, no pudo ser leído, fue guardado por una versión distinta o no
+                 corresponde con el descriptor de modularización cuya huella es 'descriptor_hash'.
+        """
+        try:
+            with plan_file.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+
+            if data.get("version") != PLAN_FORMAT_VERSION or data.get("descriptorHash") != descriptor_hash:
+                return None
+
+            plan = cls(descriptor_hash, [Artifact.from_json(a) for a in data["artifacts"]], data["levels"])
+            for name, entry in data["jars"].items():
+                plan.__jars[name] = {
+                    "fingerprint": tuple(entry["fingerprint"]),
+                    "packages": set(entry["packages"]),
+                    "notes": entry["notes"],
+                    "problems": entry["problems"],
+                    "has_module_descriptor": entry["hasModuleDescriptor"],
+                    "module_descriptor_source": entry["moduleDescriptorSource"]
+                }
+        except Exception:
+            return None
+
+        plan.__modified = False
+        return plan
+
+    def save(self, plan_file: Path):
+        """
+        Guarda el plan en 'plan_file' si fue modificado desde que se creó o cargó.
+        """
+        if not self.__modified:
+            return
+
+        plan_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Se escribe primero en un archivo temporal y luego se renombra para nunca dejar un plan escrito a medias
+        fd, temp_path = tempfile.mkstemp(dir=str(plan_file.parent), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.__to_json(), f)
+            # mkstemp() crea el archivo con permisos solo para el usuario actual y el directorio de destino puede ser
+            # compartido por los fragmentos (shards) de otras máquinas
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, str(plan_file))
+        except:
+            os.unlink(temp_path)
+            raise
+
+        self.__modified = False
+
+    def __to_json(self):
+        return {
+            "version": PLAN_FORMAT_VERSION,
+            "descriptorHash": self.__descriptor_hash,
+            "artifacts": [a.to_json() for a in self.__artifacts],
+            "levels": self.__levels,
+            "jars": {name: {
+                "fingerprint": list(entry["fingerprint"]),
+                "packages": sorted(entry["packages"]),
+                "notes": entry["notes"],
+                "problems": entry["problems"],
+                "hasModuleDescriptor": entry["has_module_descriptor"],
+                "moduleDescriptorSource": entry["module_descriptor_source"]
+            } for name, entry in self.__jars.items()}
+        }
+
+    def get_descriptor_hash(self):
+        return self.__descriptor_hash
+
+    def get_artifacts(self):
+        """
+        :return: Lista de artefactos en el orden en que deben ser modularizados.
+        """
+        return self.__artifacts
+
+    def get_level(self, artifact):
+        return self.__levels.get(artifact.get_name())
+
+    def get_artifact_by_module_name(self, module_name):
+        """
+        :return: El artefacto que define el módulo 'module_name' o None si ninguno lo define.
+        """
+        return self.__module_index.get(module_name)
+
+    @classmethod
+    def __get_jar_fingerprint(cls, file: Path):
+        stat = file.stat()
+        return stat.st_size, stat.st_mtime_ns
+
+    def __get_jar_entry(self, artifact, file):
+        entry = self.__jars.get(artifact.get_name())
+        if entry is not None and entry["fingerprint"] == self.__get_jar_fingerprint(file):
+            return entry
+
+        return None
+
+    def get_jar_packages(self, artifact, file: Path):
+        """
+        :return: Tupla (paquetes no vacíos, notas sobre las clases ignoradas, problemas, contiene definición de módulo)
+                 del JAR 'file' o None si el JAR no ha sido analizado o cambió desde que se analizó.
+        """
+        entry = self.__get_jar_entry(artifact, file)
+        if entry is None:
+            return None
+
+        return entry["packages"], entry["notes"], entry["problems"], entry["has_module_descriptor"]
+
+    def set_jar_packages(self, artifact, file: Path, packages, notes, problems, has_module_descriptor):
+        self.__jars[artifact.get_name()] = {
+            "fingerprint": self.__get_jar_fingerprint(file),
+            "packages": packages,
+            "notes": notes,
+            "problems": problems,
+            "has_module_descriptor": has_module_descriptor,
+            "module_descriptor_source": None
+        }
+        self.__modified = True
+
+    def get_module_descriptor_source(self, artifact, file: Path):
+        """
+        :return: Código fuente del descriptor del módulo (module-info.java) generado para el JAR 'file' o None si no ha
+                 sido generado o el JAR cambió desde que se generó.
+        """
+        entry = self.__get_jar_entry(artifact, file)
+        if entry is None:
+            return None
+
+        return entry["module_descriptor_source"]
+
+    def set_module_descriptor_source(self, artifact, file: Path, module_descriptor_source):
+        entry = self.__get_jar_entry(artifact, file)
+        if entry is not None:
+            entry["module_descriptor_source"] = module_descriptor_source
+            self.__modified = True
@@ -0,0 +1,315 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import collections
+
+from .entity import Artifact
+from .tda import Tree
+from .tda import TreeNode
+
+
+class DependencyPlanner:
+    """
+    Determina el orden en que deben ser modularizados los artefactos de acuerdo a las dependencias ('requiresModules')
+    entre ellos.
+    """
+
+    @classmethod
+    def sort(cls, artifacts):
+        """
+        Ordena artefactos definidos en el descriptor de modularización teniendo en cuenta las dependencias entre ellos.
+        Aquellos artefactos que menos niveles de dependencias tengan terminarán siendo primeros que aquellos que más niveles
+        dependencias tengan.
+
+        Cuando hablamos de niveles de dependencias nos referimos a que si el artefacto A depende de B y este a su vez
+        depende de C, primero irá C, luego B y por último A.
+
+        Es importante aclarar que las únicas dependencias que cuentan para los fines explicados arriba son aquellas que
+        hacen referncia a los módulos que deseamos crear (aquellos cuya definición está declarada en el descriptor de
+        modularización), nunca las que referencian a terceros módulos ya existentes.
+
+        :param artifacts: Colección de artefactos a ordenar.
+        :return: Tupla (lista de artefactos ordenados, diccionario nombre de artefacto->nivel de dependencias). El nivel
+                 de un artefacto es 0 si no requiere ningún módulo definido por otro artefacto o, en caso contrario, uno
+                 más que el mayor nivel de los módulos que requiere. Solo depende del grafo de dependencias (nunca del
+                 orden de 'artifacts'), por lo que es el mismo en todas las máquinas.
+
+        ImplNote: Para lograr este orden se agregan cada unos de los artefactos contenidos en 'artifacts'
+                  en un árbol de dependencias, quedando en los niveles superiores aquellos que más niveles de dependencias
+                  tengan.
+        """
+
+        # Crear el árbol de dependencias con una raíz ficticia ya que no contiene datos. Esto
+        # se hace para que todos los nodos con la misma profundidad en su decendencia se encuentren
+        # al mismo nivel
+        dependencies_tree = Tree(TreeNode(Artifact()))
+
+        # Índice nombre de módulo->artefacto que lo define. Si varios artefactos definen el mismo módulo se toma el
+        # primero de ellos
+        module_index = {}
+        for artifact in artifacts:
+            module_index.setdefault(artifact.get_module().get_name(), artifact)
+
+        # Las dependencias entre módulos de un mismo ciclo se ignoran, de lo contrario un subárbol terminaría siendo
+        # agregado dentro de sí mismo. Los artefactos de un ciclo no pueden ser modularizados (ver find_cycles())
+        graph = DependencyPlanner.__build_graph(artifacts)
+        component_index = {}
+        for component in DependencyPlanner.__find_strongly_connected_components(graph):
+            for module_name in component:
+                component_index[module_name] = component
+
+        for artifact in artifacts:
+            # Busco si en el árbol ya existe un artefacto que defina el mismo módulo que el
+            # artefacto analizado. Si esto ocurre es porque se trata del mismo artefacto.
+            artifact_node = dependencies_tree.find_node_by_data(artifact,
+                                                                DependencyPlanner.__equals_artifact_by_module_name)
+
+            # Si no es parte del árbol de dependencias creo un nuevo nodo
+            if artifact_node is None:
+                artifact_node = TreeNode(artifact)
+                # Lo agrego como hijo de la raíz
+                dependencies_tree.get_root().get_children().append(artifact_node)
+
+            # Esto es un truco para poder utilizar la referencia artifactNode dentro de expresiones lambda
+            # puesto que al no ser final o efectivamente final me lanza error
+            # artifactNodeReference = AtomicReference<>(artifactNode)
+
+            # Agregar como hijos los módulos de los que depende el artefacto actual y
+            # que se encuentran definidos cómo módulos por otros artefactos
+            requires_modules = artifact.get_module().get_requires_modules()
+            if requires_modules is not None:
+                for module_name in requires_modules:
+                    # Busco si el módulo requerido es definido por alguno de los artefactos
+                    a = module_index.get(module_name)
+                    # Si encuentro el artefacto que lo define (y no forma parte de un ciclo con el actual)...
+                    if a is not None and \
+                            component_index[module_name] is not component_index[artifact.get_module().get_name()]:
+                        # Busco si el artefacto ya existe en el árbol de dependencias
+                        require_module_node = dependencies_tree.find_node_by_data(
+                            a, DependencyPlanner.__equals_artifact_by_module_name)
+
+                        if require_module_node is None:
+                            # Si no existe agrego el artefacto encontrado como hijo del artefacto actual
+                            artifact_node.get_children().append(TreeNode(a))
+                        else:
+                            # Si ya existe en el árbol...
+                            current_artifact_level = dependencies_tree.get_node_level(artifact_node)
+                            required_artifact_level = dependencies_tree.get_node_level(require_module_node)
+
+                            # Si el nivel en que se encuentra el artefacto requerido es menor o igual
+                            # que el nivel donde se encuentra el artefacto actual, se lo quito al padre
+                            # y lo agrego como hijo del artefacto actual.
+                            # En caso contrario no es necesario hacerlo ya que si el nivel del requerido
+                            # es mayor, este será modularizado antes
+                            if required_artifact_level <= current_artifact_level:
+                                dependencies_tree.remove_subtree(require_module_node)
+                                artifact_node.get_children().append(require_module_node)
+
+        # Obtener el listado de ordenado de los artefactos según deben ser modularizados
+        # Los primeros deben ser los que se hayan en el nivel más profundo
+        artifact_list = []
+        i = dependencies_tree.get_tree_level()
+        while i > 0:
+            nodes_at_level = dependencies_tree.get_nodes_at_level(i)
+            for item in nodes_at_level:
+                artifact_list.append(item.get_data())
+            i -= 1
+
+        module_levels = DependencyPlanner.__compute_levels(graph, component_index)
+        levels = {a.get_name(): module_levels[a.get_module().get_name()] for a in artifact_list}
+
+        return artifact_list, levels
+
+    @classmethod
+    def __compute_levels(cls, graph, component_index):
+        """
+        Calcula el nivel de dependencias de cada módulo del grafo (la longitud del camino más largo hasta un módulo sin
+        dependencias). Las dependencias entre módulos de un mismo ciclo se ignoran. Implementación iterativa, para no
+        depender del límite de recursión de Python.
+
+        :return: Diccionario nombre de módulo->nivel.
+        """
+        levels = {}
+        for start in graph:
+            if start in levels:
+                continue
+
+            work = [(start, iter(graph[start]))]
+            while work:
+                node, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    if child not in levels and component_index[child] is not component_index[node]:
+                        work.append((child, iter(graph[child])))
+                    continue
+
+                work.pop()
+                levels[node] = max([levels[m] + 1 for m in graph[node]
+                                    if component_index[m] is not component_index[node]], default=0)
+
+        return levels
+
+    @classmethod
+    def find_cycles(cls, artifacts):
+        """
+        Busca las dependencias cíclicas ('requiresModules') entre los módulos de los artefactos 'artifacts' calculando
+        sus componentes fuertemente conexas (algoritmo de Tarjan).
+
+        JPMS no permite dependencias cíclicas entre módulos, por lo que javac rechaza el descriptor de cualquiera de los
+        módulos de un ciclo, incluso compilándolos juntos en una misma ejecución. Ninguno de estos artefactos puede ser
+        modularizado.
+
+        :param artifacts: Colección de artefactos a analizar.
+        :return: Diccionario nombre de artefacto->lista con los nombres de los módulos del ciclo más corto que contiene
+                 a su módulo, comenzando y terminando por este (ej. ['a', 'b', 'a']). Solo contiene los artefactos que
+                 forman parte de algún ciclo.
+        """
+        graph = cls.__build_graph(artifacts)
+
+        cycles_by_module = {}
+        for component in cls.__find_strongly_connected_components(graph):
+            module_name = component[0]
+            if len(component) > 1 or module_name in graph[module_name]:
+                for m in component:
+                    cycles_by_module[m] = cls.__find_shortest_cycle(graph, m)
+
+        cycles = {}
+        for artifact in artifacts:
+            cycle = cycles_by_module.get(artifact.get_module().get_name())
+            if cycle is not None:
+                cycles[artifact.get_name()] = cycle
+
+        return cycles
+
+    @classmethod
+    def __build_graph(cls, artifacts):
+        """
+        :return: Grafo de dependencias entre los módulos de 'artifacts' (diccionario nombre de módulo->lista de módulos
+                 requeridos). Solo se tienen en cuenta los módulos definidos por los artefactos. Los módulos automáticos
+                 no leen ningún módulo de forma explícita, por lo que no tienen dependencias.
+        """
+        graph = {}
+        for artifact in artifacts:
+            graph.setdefault(artifact.get_module().get_name(), [])
+
+        for artifact in artifacts:
+            module = artifact.get_module()
+            if not module.is_automatic():
+                requires_modules = graph[module.get_name()]
+                for module_name in module.get_requires_modules() or []:
+                    if module_name in graph and module_name not in requires_modules:
+                        requires_modules.append(module_name)
+
+        return graph
+
+    @classmethod
+    def __find_strongly_connected_components(cls, graph):
+        """
+        Implementación iterativa del algoritmo de Tarjan, para no depender del límite de recursión de Python.
+
+        :return: Lista de componentes fuertemente conexas, cada una de ellas una lista de nombres de módulos.
+        """
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        components = []
+
+        for start in graph:
+            if start in index:
+                continue
+
+            index[start] = lowlink[start] = len(index)
+            stack.append(start)
+            on_stack.add(start)
+            work = [(start, iter(graph[start]))]
+
+            while work:
+                node, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(graph[child])))
+                    elif child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                # 'node' es la raíz de una componente, la cual está formada por los nodos que están sobre él en la pila
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        m = stack.pop()
+                        on_stack.discard(m)
+                        component.append(m)
+                        if m == node:
+                            break
+                    components.append(component)
+
+        return components
+
+    @classmethod
+    def __find_shortest_cycle(cls, graph, module_name):
+        """
+        :return: Lista con los nombres de los módulos del ciclo más corto (búsqueda en anchura) que comienza y termina
+                 en el módulo 'module_name', o None si este no forma parte de ningún ciclo.
+        """
+        parents = {}
+        queue = collections.deque()
+        for m in graph[module_name]:
+            if m not in parents:
+                parents[m] = module_name
+                queue.append(m)
+
+        while queue:
+            current = queue.popleft()
+            if current == module_name:
+                # Reconstruir el camino desde el final
+                cycle = [module_name]
+                current = parents[module_name]
+                while current != module_name:
+                    cycle.append(current)
+                    current = parents[current]
+                cycle.append(module_name)
+                cycle.reverse()
+                return cycle
+
+            for m in graph[current]:
+                if m not in parents:
+                    parents[m] = current
+                    queue.append(m)
+
+        return None
+
+    @classmethod
+    def __equals_artifact_by_module_name(cls, a1, a2):
+        if a1.get_module() is not None and a2.get_module() is not None:
+            return a1.get_module().get_name() == a2.get_module().get_name()
+
+        return False
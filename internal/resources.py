@@ -0,0 +1,196 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from pathlib import Path
+import math
+import os
+import shutil
+import zipfile
+
+# Memoria estimada que necesita una ejecución de javac (la JVM completa, no solo su heap) para compilar un descriptor de
+# módulo. Se utiliza para calcular cuántas compilaciones simultáneas admite la memoria disponible
+JAVAC_MEMORY = 384 * 1024 * 1024
+
+# Fracción del espacio libre en disco que puede ser utilizada por los JARs en proceso. El resto se reserva para no
+# llenar el disco de la máquina
+DISK_BUDGET_RATIO = 0.9
+
+# Los límites de memoria de cgroup v1 mayores que este valor indican que no hay límite
+CGROUP_V1_UNLIMITED = 1 << 60
+
+
+class ResourceProbe:
+    """
+    Consulta los recursos disponibles (CPUs, memoria y espacio en disco) teniendo en cuenta los límites impuestos al
+    proceso (afinidad de CPU y cgroups v1/v2 en contenedores), para dimensionar la cantidad de JARs que se modularizan
+    simultáneamente.
+    """
+
+    @classmethod
+    def get_cpu_count(cls):
+        """
+        :return: Cantidad de CPUs que puede utilizar el proceso según su afinidad y la cuota de CPU de su cgroup.
+        """
+        try:
+            count = len(os.sched_getaffinity(0))
+        except (AttributeError, OSError):
+            count = os.cpu_count() or 1
+
+        quota = cls.__read_cgroup_cpu_quota()
+        if quota is not None:
+            count = min(count, max(1, math.ceil(quota)))
+
+        return count
+
+    @classmethod
+    def __read_cgroup_cpu_quota(cls):
+        # cgroup v2: "<cuota> <periodo>" o "max <periodo>"
+        values = cls.__read_file("/sys/fs/cgroup/cpu.max")
+        if values is not None:
+            values = values.split()
+            if len(values) == 2 and values[0] != "max":
+                return int(values[0]) / int(values[1])
+            return None
+
+        # cgroup v1: una cuota de -1 indica que no hay límite
+        quota = cls.__read_int("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        period = cls.__read_int("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if quota is not None and period and quota > 0:
+            return quota / period
+
+        return None
+
+    @classmethod
+    def get_available_memory(cls):
+        """
+        :return: Memoria disponible en bytes: la menor entre la memoria disponible del sistema y la que le queda al
+                 cgroup del proceso antes de alcanzar su límite, o None si no es posible determinarla.
+        """
+        candidates = []
+
+        # cgroup v2
+        limit = cls.__read_file("/sys/fs/cgroup/memory.max")
+        if limit is not None and limit != "max":
+            usage = cls.__read_int("/sys/fs/cgroup/memory.current") or 0
+            candidates.append(int(limit) - usage)
+        elif limit is None:
+            # cgroup v1
+            limit = cls.__read_int("/sys/fs/cgroup/memory/memory.limit_in_bytes")
+            if limit is not None and limit < CGROUP_V1_UNLIMITED:
+                usage = cls.__read_int("/sys/fs/cgroup/memory/memory.usage_in_bytes") or 0
+                candidates.append(limit - usage)
+
+        available = cls.__read_meminfo_available()
+        if available is None:
+            try:
+                available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+            except (AttributeError, ValueError, OSError):
+                pass
+
+        if available is not None:
+            candidates.append(available)
+
+        return max(0, min(candidates)) if len(candidates) > 0 else None
+
+    @classmethod
+    def __read_meminfo_available(cls):
+        meminfo = cls.__read_file("/proc/meminfo")
+        if meminfo is not None:
+            for line in meminfo.splitlines():
+                if line.startswith("MemAvailable:"):
+                    # El valor se expresa en kB
+                    return int(line.split()[1]) * 1024
+
+        return None
+
+    @classmethod
+    def get_free_disk_space(cls, path: Path):
+        """
+        :return: Espacio libre en bytes del sistema de archivos que contiene 'path' (o su primer ancestro existente) o
+                 None si no es posible determinarlo.
+        """
+        path = Path(path).absolute()
+        while not path.exists() and path.parent != path:
+            path = path.parent
+
+        try:
+            return shutil.disk_usage(str(path)).free
+        except OSError:
+            return None
+
+    @classmethod
+    def get_disk_budget(cls, path: Path):
+        """
+        :return: Espacio en disco en bytes que pueden ocupar los JARs en proceso en el directorio 'path' o None si no
+                 hay límite conocido.
+        """
+        free = cls.get_free_disk_space(path)
+        return int(free * DISK_BUDGET_RATIO) if free is not None else None
+
+    @classmethod
+    def compute_worker_count(cls):
+        """
+        :return: Cantidad de JARs que se pueden modularizar simultáneamente: una por CPU, limitada por la cantidad de
+                 ejecuciones de javac que caben en la memoria disponible (al menos una).
+        """
+        workers = cls.get_cpu_count()
+
+        memory = cls.get_available_memory()
+        if memory is not None:
+            workers = min(workers, memory // JAVAC_MEMORY)
+
+        return max(1, workers)
+
+    @classmethod
+    def get_jar_disk_usage(cls, file: Path, extract=True):
+        """
+        Calcula el espacio en disco que ocupará la modularización del JAR 'file' a partir de su directorio central, sin
+        leer el contenido de sus entradas.
+
+        :param file: Archivo JAR.
+        :param extract: Si es True se incluye el tamaño descomprimido de todas sus entradas (el JAR será extraído).
+        :return: Tupla (espacio temporal, espacio permanente) en bytes. El temporal es el tamaño descomprimido de sus
+                 entradas si 'extract' es True (0 en caso contrario), que se libera al terminar, y el permanente el
+                 tamaño del JAR modularizado (aproximadamente el del original).
+        """
+        temporary_usage = 0
+        if extract:
+            with zipfile.ZipFile(file, "r") as jar_file:
+                temporary_usage = sum([info.file_size for info in jar_file.infolist()])
+
+        return temporary_usage, file.stat().st_size
+
+    @classmethod
+    def __read_file(cls, path):
+        try:
+            return Path(path).read_text().strip()
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def __read_int(cls, path):
+        value = cls.__read_file(path)
+        try:
+            return int(value) if value is not None else None
+        except ValueError:
+            return None
@@ -0,0 +1,183 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from pathlib import Path
+import json
+import os
+import tempfile
+
+# Nombre del archivo, dentro del directorio de destino, donde cada fragmento (shard) guarda su reporte
+SHARD_REPORT_FILE_NAME = ".jarmod-shard-{index}-of-{count}.json"
+
+
+class ShardPartitioner:
+    """
+    Divide los artefactos de un descriptor de modularización en N fragmentos (shards) balanceados para que puedan ser
+    modularizados en N máquinas distintas.
+
+    Se reparten artefactos individuales, no grupos de artefactos relacionados, ya que en un descriptor real casi todos
+    los artefactos dependen (directa o indirectamente) de unos pocos módulos base. Los artefactos se reparten nivel
+    por nivel de dependencias (ver DependencyPlanner.sort()), asignando siempre el más pesado al fragmento con menos
+    carga en ese nivel, donde el peso de un artefacto es el tamaño de su archivo JAR. Así todos los fragmentos avanzan
+    a la par: un artefacto cuyo módulo requerido fue asignado a otro fragmento espera a que el JAR modularizado de este
+    aparezca en el directorio de destino compartido (ver Modularizer).
+
+    La partición solo depende del descriptor y de los tamaños de los JARs, por lo que todas las máquinas obtienen la
+    misma partición sin necesidad de comunicarse entre ellas.
+    """
+
+    @classmethod
+    def parse_shard(cls, value):
+        """
+        Interpreta un fragmento con el formato 'i/N', donde 1 <= i <= N.
+
+        :return: Tupla (i, N).
+        :exception ValueError: Si el formato no es válido.
+        """
+        try:
+            index, count = [int(v) for v in value.split("/")]
+        except Exception:
+            raise ValueError("Invalid shard '" + value + "'. Expected format is i/N")
+
+        if count < 1 or index < 1 or index > count:
+            raise ValueError("Invalid shard '" + value + "'. It must be 1 <= i <= N")
+
+        return index, count
+
+    @classmethod
+    def partition(cls, artifacts, weights, levels, count):
+        """
+        :param artifacts: Lista de artefactos a repartir.
+        :param weights: Diccionario nombre de artefacto->peso.
+        :param levels: Diccionario nombre de artefacto->nivel de dependencias.
+        :param count: Cantidad de fragmentos.
+        :return: Lista con 'count' listas de artefactos. El orden relativo de los artefactos de cada fragmento es el
+                 mismo que el de 'artifacts'.
+        """
+        by_level = {}
+        for artifact in artifacts:
+            by_level.setdefault(levels.get(artifact.get_name(), 0), []).append(artifact)
+
+        # Asignar los artefactos de cada nivel, del más pesado al más ligero, al fragmento con menos carga en el nivel.
+        # Los empates se resuelven por la carga total y por nombre para que la partición sea la misma en todas las
+        # máquinas
+        total_loads = [0] * count
+        shard_by_artifact = {}
+        for level in sorted(by_level):
+            level_loads = [0] * count
+            for artifact in sorted(by_level[level], key=lambda a: (-weights.get(a.get_name(), 0), a.get_name())):
+                shard = min(range(count), key=lambda i: (level_loads[i], total_loads[i], i))
+                level_loads[shard] += weights.get(artifact.get_name(), 0)
+                total_loads[shard] += weights.get(artifact.get_name(), 0)
+                shard_by_artifact[artifact.get_name()] = shard
+
+        shards = [[] for _ in range(count)]
+        for artifact in artifacts:
+            shards[shard_by_artifact[artifact.get_name()]].append(artifact)
+
+        return shards
+
+
+class ShardReport:
+    """
+    Reporte que cada fragmento mantiene en el directorio de destino mientras se ejecuta. Se guarda cada vez que termina
+    un artefacto, para que los demás fragmentos sepan cuáles fallaron (y no esperen por ellos), y al terminar queda
+    marcado como terminado. Permite verificar, una vez que todas las máquinas terminaron, que todos los artefactos
+    fueron modularizados.
+    """
+
+    def __init__(self, index, count, descriptor_hash, artifacts, modularized, failed=None, finished=False):
+        self.__index = index
+        self.__count = count
+        self.__descriptor_hash = descriptor_hash
+        self.__artifacts = artifacts
+        self.__modularized = modularized
+        self.__failed = failed if failed is not None else {}
+        self.__finished = finished
+
+    @classmethod
+    def __get_report_file(cls, destination_dir: Path, index, count):
+        return destination_dir / SHARD_REPORT_FILE_NAME.format(index=index, count=count)
+
+    @classmethod
+    def load(cls, destination_dir: Path, index, count):
+        """
+        :return: El reporte del fragmento 'index' de 'count' o None si no existe o no pudo ser leído.
+        """
+        try:
+            data = json.loads(cls.__get_report_file(destination_dir, index, count).read_text())
+            return cls(index, count, data["descriptor"], data["artifacts"], data["modularized"], data["failed"],
+                       data["finished"])
+        except Exception:
+            return None
+
+    def save(self, destination_dir: Path):
+        destination_dir.mkdir(parents=True, exist_ok=True)
+        data = {
+            "descriptor": self.__descriptor_hash,
+            "artifacts": self.__artifacts,
+            "modularized": self.__modularized,
+            "failed": self.__failed,
+            "finished": self.__finished
+        }
+
+        # El reporte es leído por los demás fragmentos mientras se ejecutan, por lo que se escribe primero en un archivo
+        # temporal (legible por todos) que luego se renombra
+        report_file = self.__get_report_file(destination_dir, self.__index, self.__count)
+        fd, temp_path = tempfile.mkstemp(dir=str(destination_dir), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(json.dumps(data, indent=2))
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, str(report_file))
+        except:
+            os.unlink(temp_path)
+            raise
+
+    def get_descriptor_hash(self):
+        return self.__descriptor_hash
+
+    def get_artifacts(self):
+        """
+        :return: Nombres de los artefactos asignados al fragmento.
+        """
+        return self.__artifacts
+
+    def get_modularized(self):
+        """
+        :return: Nombres de los artefactos modularizados satisfactoriamente por el fragmento.
+        """
+        return self.__modularized
+
+    def get_failed(self):
+        """
+        :return: Diccionario nombre de artefacto->nombre del JAR causante del fallo, para los artefactos que no pudieron
+                 ser modularizados (o fueron omitidos) por el fragmento.
+        """
+        return self.__failed
+
+    def is_finished(self):
+        return self.__finished
+
+    def set_finished(self, finished):
+        self.__finished = finished
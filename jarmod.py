@@ -26,9 +26,15 @@ from argparse import ArgumentParser
 from argparse import RawTextHelpFormatter
 from os import path
 from os import linesep
+from os import pathsep
 from pathlib import Path
 from internal import Modularizer
 from internal import Compiler
+from internal import ModuleCache
+from internal import MemoryCacheBackend
+from internal import Job
+from internal import ShardPartitioner
+import json
 import time
 
 
@@ -44,6 +50,9 @@ class Main:
         self.__source_dir = None
         self.__dest_dir = None
         self.__jdk_home = None
+        self.__cache = None
+        self.__shard = None
+        self.__jobs = None
 
     def main(self):
         # Construir el menú de ayuda
@@ -54,28 +63,60 @@ class Main:
                                 formatter_class=RawTextHelpFormatter,
                                 epilog=self.__copyright + linesep + self.__icon_copyright)
 
-        parser.add_argument("DESCRIPTOR", help="Path to modularization descriptor file")
-        parser.add_argument("SOURCE", help="Path to directory containing source JAR files")
+        parser.add_argument("DESCRIPTOR", nargs="?", help="Path to modularization descriptor file")
+        parser.add_argument("SOURCE", nargs="?", help="Path to directory containing source JAR files")
 
         parser.add_argument("--dest", metavar="<path>", help="Path to modularized JAR files destination directory. Will be created is not exist. Default is SOURCE/mods.")
         parser.add_argument("--module-path", metavar="<path>", help="Path to directories ans/or files containing depending modules")
         parser.add_argument("--jdk-home", metavar="<path>", help="Path to JDK root directory. By default current $JAVA_HOME will be used")
+        parser.add_argument("--cache-dir", metavar="<path>", help="Path to local cache directory for compiled module descriptors")
+        parser.add_argument("--remote-cache", metavar="<url|path>", help="Shared team cache for compiled module descriptors. Could be a HTTP URL\n(GET/PUT <url>/<key>) or a path to a shared directory (ej. NFS)")
+        parser.add_argument("--cache-timeout", metavar="<seconds>", type=float, default=5, help="Timeout for remote cache requests. Default is 5 seconds")
+        parser.add_argument("--automatic-modules", action="store_true", help="Artifacts without 'exportsPackages' and 'requiresModules' become automatic\nmodules ('Automatic-Module-Name' manifest attribute) instead of explicit\nmodules. No compilation is needed for them")
+        parser.add_argument("--javac-profile", choices=["default", "startup"], default="default", help="JVM profile for javac. 'startup' uses startup oriented JVM options and a\nclass data sharing archive (JDK 13 or later) created on first use in\n--cache-dir (or ~/.jarmod). Default is 'default'")
+        parser.add_argument("--keep-going", action="store_true", help="Try to modularize JARs that depend on modules that could not be\nmodularized. By default they are skipped")
+        parser.add_argument("--reproducible", action="store_true", help="Create byte-for-byte reproducible modularized JARs (sorted entries, fixed\ntimestamps from $SOURCE_DATE_EPOCH or 1980-01-01 and normalized metadata)")
+        parser.add_argument("--jobs", "-j", metavar="<n|auto>", default="auto", help="Number of JAR files modularized at the same time. 'auto' uses one per\navailable CPU, limited by the available memory (cgroup aware). JARs are\nalso admitted according to the free disk space in --dest. Default is 'auto'")
+        parser.add_argument("--shard", metavar="<i/N>", help="Modularize only the shard i of N (1 <= i <= N). A shard waits for the\nmodules required from other shards. Run every shard with the\nsame DESCRIPTOR, SOURCE and --dest and then use --merge-shards")
+        parser.add_argument("--shard-timeout", metavar="<seconds>", type=float, default=3600, help="Maximum time a shard waits for a module required from another shard.\nDefault is 3600 seconds")
+        parser.add_argument("--merge-shards", metavar="<N>", type=int, help="Verify that the N shards finished and all JARs were modularized")
+        parser.add_argument("--batch", metavar="<path>", help="Path to a batch manifest file. All its jobs (DESCRIPTOR, SOURCE, --dest and\n--module-path) are processed in a single process sharing the compiler\nand the cache. DESCRIPTOR and SOURCE must not be used")
         parser.add_argument("--version", help="Display program version and exit", action="version", version=f"Version {self.__prod_version}")
         parser.add_argument("--help", "-h", action="help", help="Display this help and exit")
 
         # Parsear los parámetros
         args = parser.parse_args()
 
+        if args.batch is not None:
+            if args.DESCRIPTOR is not None or args.SOURCE is not None:
+                parser.error("DESCRIPTOR and SOURCE can not be used with --batch")
+            if args.merge_shards is not None:
+                parser.error("--merge-shards can not be used with --batch")
+        elif args.DESCRIPTOR is None or args.SOURCE is None:
+            parser.error("the following arguments are required: DESCRIPTOR, SOURCE")
+
         # Validar los parámetros
         if not self.__validate_args(args):
             return
 
+        if args.batch is not None:
+            self.__run_batch(args)
+            return
+
         # Iniciar el proceso
-        modularizer = Modularizer(self.__descriptor_file, self.__source_dir, self.__dest_dir, self.__jdk_home, args.module_path)
+        compiler = self.__build_compiler(args)
+        modularizer = Modularizer(self.__descriptor_file, self.__source_dir, self.__dest_dir, self.__jdk_home, args.module_path,
+                                  self.__cache, compiler, args.automatic_modules, self.__shard, args.keep_going,
+                                  args.reproducible, self.__jobs, args.shard_timeout)
 
         start_time = time.time()
         try:
-            if not modularizer.start():
+            if args.merge_shards is not None:
+                successful = modularizer.verify_shards(args.merge_shards)
+            else:
+                successful = modularizer.start()
+
+            if not successful:
                 # Si entra aquí significa que hubo errores durante el proceso, pero quizás algunos
                 # JARs pudieron ser modularizados
                 print("--------------------------------------------------------------------")
@@ -95,11 +136,179 @@ class Main:
         print()
         print(f"  {modularizer.get_count_modularized()} JARs modularized in {self.__get_duration_str(start_time, end_time)}")
         print(f"  {modularizer.get_count_error_founds()} errors found")
+        if len(modularizer.get_skipped_artifacts()) > 0:
+            print(f"  {len(modularizer.get_skipped_artifacts())} JARs skipped because of failed dependencies")
+        if self.__cache is not None:
+            print(f"  {self.__cache.get_count_hits()} module descriptors taken from cache")
+        self.__print_compiler_report(compiler)
+        print()
+
+    def __run_batch(self, args):
+        """
+        Procesa todos los trabajos definidos en el manifiesto de procesamiento por lotes en un mismo proceso. Todos los
+        trabajos comparten la misma instancia del compilador (el JDK se valida una sola vez) y la misma caché de
+        descriptores compilados, por lo que un JAR presente en varios trabajos con la misma definición de módulo solo se
+        compila una vez.
+
+        Primero se preparan todos los trabajos (se cargan sus planes y se analizan sus JARs) y luego las tareas de todos
+        ellos se ejecutan en un mismo planificador (ver --jobs), de modo que los JARs de un trabajo se modularizan
+        mientras otros trabajos esperan por sus dependencias.
+
+        El manifiesto es un archivo JSON con el siguiente formato (las rutas relativas, incluidas cada una de las del
+        module path, lo son respecto al directorio que contiene el manifiesto):
+
+            [{"descriptor": "<path>", "source": "<path>", "dest": "<path>", "modulePath": "<path>"}, ...]
+        """
+        manifest_path = Path(args.batch)
+        try:
+            jobs = list(map(Job.from_json, json.loads(manifest_path.read_text())))
+        except Exception as e:
+            print("[ERROR] Error parsing batch manifest file. " + str(e))
+            return
+
+        # Validar el JDK una sola vez para todos los trabajos
+        compiler = self.__build_compiler(args)
+        if compiler.get_jdk_home() is None:
+            print("[ERROR] JAVA_HOME enviroment variable is not defined.")
+            return
+
+        # Aunque no se haya especificado una caché se utiliza una en memoria para no compilar varias veces el mismo JAR
+        cache = self.__cache if self.__cache is not None else ModuleCache(MemoryCacheBackend())
+
+        # Trabajos (archivo descriptor, Modularizer, estado, tareas, momentos en que terminaron sus tareas) y tareas de
+        # todos ellos. Las dependencias de cada tarea se desplazan según la posición de las tareas de su trabajo
+        results = []
+        tasks = []
+        destination_dirs = []
+        start_time = time.time()
+        for job in jobs:
+            descriptor_file = self.__resolve_batch_path(manifest_path, job.get_descriptor())
+            source_dir = self.__resolve_batch_path(manifest_path, job.get_source())
+            dest_dir = self.__resolve_batch_path(manifest_path, job.get_dest())
+
+            module_path = self.__resolve_batch_module_path(manifest_path, job.get_module_path())
+
+            modularizer = None
+            status = "ERROR"
+            job_tasks = None
+            end_times = []
+            if self.__validate_descriptor_file(descriptor_file) and self.__validate_source_dir(source_dir):
+                dest_dir = self.__build_dest_dir(dest_dir, source_dir)
+                if dest_dir is not None:
+                    modularizer = Modularizer(Path(descriptor_file), Path(source_dir), dest_dir, self.__jdk_home,
+                                              module_path, cache, compiler, args.automatic_modules,
+                                              self.__shard, args.keep_going, args.reproducible, self.__jobs,
+                                              args.shard_timeout)
+                    try:
+                        job_tasks = modularizer.prepare()
+                        status = "WARN"
+                    except Exception as e:
+                        print(e)
+
+            if job_tasks is not None:
+                offset = len(tasks)
+                for function, dependencies, disk_usage, ready in job_tasks:
+                    tasks.append((self.__track_end_time(function, end_times), [d + offset for d in dependencies],
+                                  disk_usage, ready))
+                destination_dirs.append(dest_dir)
+
+            results.append([descriptor_file, modularizer, status, job_tasks, end_times])
+
+        error = None
+        if len(tasks) > 0:
+            try:
+                Modularizer.build_executor(self.__jobs, destination_dirs).run(tasks)
+            except Exception as e:
+                print(e)
+                error = e
+
+        for result in results:
+            modularizer, job_tasks = result[1], result[3]
+            if job_tasks is not None:
+                successful = modularizer.finish()
+                result[2] = "ERROR" if error is not None else "OK" if successful else "WARN"
+
+        end_time = time.time()
+
+        # Reporte combinado de todos los trabajos
+        total_modularized = 0
+        total_errors = 0
+        total_skipped = 0
+        print()
+        print("--------------------------------------------------------------------")
+        print("  Batch summary")
         print()
+        for descriptor_file, modularizer, status, job_tasks, end_times in results:
+            count_modularized = modularizer.get_count_modularized() if modularizer is not None else 0
+            count_errors = modularizer.get_count_error_founds() if modularizer is not None else 1
+            count_skipped = len(modularizer.get_skipped_artifacts()) if modularizer is not None else 0
+            total_modularized += count_modularized
+            total_errors += count_errors
+            total_skipped += count_skipped
+            # Los trabajos se ejecutan a la vez, por lo que su duración se cuenta desde el inicio del lote
+            print(f"  {('[' + status + ']'):<8}{descriptor_file}: {count_modularized} JARs modularized, "
+                  f"{count_errors} errors found, {count_skipped} skipped "
+                  f"({self.__get_duration_str(start_time, max(end_times, default=start_time))})")
+
+        print()
+        print(f"  {len(results)} jobs processed in {self.__get_duration_str(start_time, end_time)}")
+        print(f"  {total_modularized} JARs modularized")
+        print(f"  {total_errors} errors found")
+        print(f"  {total_skipped} JARs skipped because of failed dependencies")
+        print(f"  {cache.get_count_hits()} module descriptors taken from cache")
+        self.__print_compiler_report(compiler)
+        print()
+
+    @classmethod
+    def __track_end_time(cls, function, end_times):
+        """
+        :return: Función que ejecuta 'function' y agrega a 'end_times' el momento en que terminó.
+        """
+        def run():
+            try:
+                return function()
+            finally:
+                end_times.append(time.time())
+
+        return run
+
+    def __build_compiler(self, args):
+        compiler = Compiler()
+        if self.__jdk_home is not None:
+            compiler.set_jdk_home(self.__jdk_home)
+
+        if args.javac_profile == "startup":
+            compiler.set_startup_profile(Path(args.cache_dir) if args.cache_dir is not None else Path.home() / ".jarmod")
+
+        return compiler
+
+    @classmethod
+    def __print_compiler_report(cls, compiler):
+        # Solo se muestra si se utilizó el perfil de arranque rápido de javac
+        average_time = compiler.get_average_compilation_time()
+        baseline_time = compiler.get_baseline_compilation_time()
+        if average_time is not None and baseline_time is not None:
+            print(f"  {compiler.get_count_compilations()} javac invocations, {average_time * 1000:.0f} ms on average "
+                  f"({(baseline_time - average_time) * 1000:.0f} ms saved per invocation by startup profile)")
+
+    @classmethod
+    def __resolve_batch_path(cls, manifest_path, job_path):
+        if job_path is None:
+            return None
+
+        return str(manifest_path.parent / job_path)
+
+    @classmethod
+    def __resolve_batch_module_path(cls, manifest_path, module_path):
+        # El module path puede contener varias rutas separadas por os.pathsep, cada una se resuelve por separado
+        if module_path is None:
+            return None
+
+        return pathsep.join([cls.__resolve_batch_path(manifest_path, p) for p in module_path.split(pathsep) if p])
 
     @classmethod
     def __get_duration_str(cls, start, end):
-        total_duration_str = str(end - start)
+        total_duration_str = f"{end - start:.3f}"
         dot_index = total_duration_str.index(".")
         total_duration_int = int(total_duration_str[:dot_index])
 
@@ -125,8 +334,82 @@ class Main:
         return "".join(duration_list)
 
     def __validate_args(self, args):
-        # Validar que el descriptor exista y sea un archivo
-        descriptor_path = args.DESCRIPTOR
+        # Los trabajos de un manifiesto de procesamiento por lotes se validan cuando son procesados
+        if args.batch is None:
+            # Validar que el descriptor exista y sea un archivo
+            if not self.__validate_descriptor_file(args.DESCRIPTOR):
+                return False
+
+            self.__descriptor_file = Path(args.DESCRIPTOR)
+
+            # Validar que el directorio fuente exista y sea un directorio
+            if not self.__validate_source_dir(args.SOURCE):
+                return False
+
+            self.__source_dir = Path(args.SOURCE)
+
+            # Validar que el directorio de destino existe y es un directorio
+            self.__dest_dir = self.__build_dest_dir(args.dest, args.SOURCE)
+            if self.__dest_dir is None:
+                return False
+
+        # Comprobar que el JDK_HOME es válido
+        # Solo si fue pasado como parámetro
+        jdk_home_path = args.jdk_home
+        if jdk_home_path is not None:
+            if not Compiler.is_valid_jdk_home(jdk_home_path):
+                print("[WARN] Invalid JDK_HOME '" + jdk_home_path + "'. Default will be used.")
+            else:
+                self.__jdk_home = Path(jdk_home_path)
+
+        # Validar el fragmento a modularizar
+        # Solo si fue pasado como parámetro
+        if args.shard is not None:
+            try:
+                self.__shard = ShardPartitioner.parse_shard(args.shard)
+            except ValueError as e:
+                print("[ERROR] " + str(e))
+                return False
+
+        if args.jobs != "auto":
+            try:
+                self.__jobs = int(args.jobs)
+                if self.__jobs < 1:
+                    raise ValueError()
+            except ValueError:
+                print("[ERROR] Invalid jobs count '" + args.jobs + "'")
+                return False
+
+        if args.shard_timeout <= 0:
+            print("[ERROR] Invalid shard timeout '" + str(args.shard_timeout) + "'")
+            return False
+
+        if args.merge_shards is not None and args.merge_shards < 1:
+            print("[ERROR] Invalid shards count '" + str(args.merge_shards) + "'")
+            return False
+
+        # Crear la caché de descriptores compilados
+        # Solo si fue pasado alguno de los parámetros
+        if args.cache_dir is not None or args.remote_cache is not None:
+            local_backend = None
+            if args.cache_dir is not None:
+                local_backend = ModuleCache.create_backend(args.cache_dir, args.cache_timeout)
+
+            remote_backend = None
+            if args.remote_cache is not None:
+                remote_backend = ModuleCache.create_backend(args.remote_cache, args.cache_timeout)
+
+            self.__cache = ModuleCache(local_backend, remote_backend)
+
+        # Si todo fue bien retorno True
+        return True
+
+    @classmethod
+    def __validate_descriptor_file(cls, descriptor_path):
+        if descriptor_path is None:
+            print("[ERROR] Descriptor file is not defined")
+            return False
+
         if not path.exists(descriptor_path):
             print("[ERROR] Descriptor file not exist (" + descriptor_path + ")")
             return False
@@ -135,10 +418,14 @@ class Main:
             print("[ERROR] Descriptor is not a file (" + descriptor_path + ")")
             return False
 
-        self.__descriptor_file = Path(descriptor_path)
+        return True
+
+    @classmethod
+    def __validate_source_dir(cls, source_dir_path):
+        if source_dir_path is None:
+            print("[ERROR] Source directory is not defined")
+            return False
 
-        # Validar que el directorio fuente exista y sea un directorio
-        source_dir_path = args.SOURCE
         if not path.exists(source_dir_path):
             print("[ERROR] Source directory not exist (" + source_dir_path + ")")
             return False
@@ -147,34 +434,27 @@ class Main:
             print("[ERROR] Source is not a directory (" + source_dir_path + ")")
             return False
 
-        self.__source_dir = Path(source_dir_path)
+        return True
 
-        # Validar que el directorio de destino existe y es un directorio
-        # Solo si fue pasado como parámetro
-        dest_dir_path = args.dest
-        if dest_dir_path is not None:
-            if path.exists(dest_dir_path):
-                if path.isfile(dest_dir_path):
-                    print("[ERROR] Destination is not a directory (" + dest_dir_path + ")")
-                    return False
-                self.__dest_dir = Path(dest_dir_path)
-            else:
-                self.__dest_dir = Path(dest_dir_path)
-                self.__dest_dir.mkdir(parents=True)
+    @classmethod
+    def __build_dest_dir(cls, dest_dir_path, source_dir_path):
+        """
+        Valida el directorio de destino (solo si fue especificado) y lo crea si no existe.
+
+        :return: Ruta al directorio de destino o None si no es válido. Si no fue especificado será SOURCE/mods.
+        """
+        if dest_dir_path is None:
+            return Path(source_dir_path, "mods")
+
+        if path.exists(dest_dir_path):
+            if path.isfile(dest_dir_path):
+                print("[ERROR] Destination is not a directory (" + dest_dir_path + ")")
+                return None
         else:
-            self.__dest_dir = Path(args.SOURCE, "mods")
+            # Varios fragmentos (--shard) pueden crearlo al mismo tiempo
+            Path(dest_dir_path).mkdir(parents=True, exist_ok=True)
 
-        # Comprobar que el JDK_HOME es válido
-        # Solo si fue pasado como parámetro
-        jdk_home_path = args.jdk_home
-        if jdk_home_path is not None:
-            if not Compiler.is_valid_jdk_home(jdk_home_path):
-                print("[WARN] Invalid JDK_HOME '" + jdk_home_path + "'. Default will be used.")
-            else:
-                self.__jdk_home = Path(jdk_home_path)
-
-        # Si todo fue bien retorno True
-        return True
+        return Path(dest_dir_path)
 
 
 # Definir punto de entrada de la aplicación si se ejecuta como script
@@ -0,0 +1,232 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import io
+import unittest
+import zipfile
+
+from internal.analyzer import PreflightAnalyzer
+from internal.entity import Artifact
+from internal.entity import Module
+
+
+def _artifact(name, exports_packages=None, requires_modules=None, automatic=False):
+    return Artifact(name + ".jar", Module(name, exports_packages, requires_modules, automatic))
+
+
+class AnalyzeTest(unittest.TestCase):
+
+    def __analyze(self, packages_by_artifact):
+        analyzer = PreflightAnalyzer()
+        for artifact, packages in packages_by_artifact:
+            analyzer.add_artifact(artifact, set(packages))
+
+        return analyzer, analyzer.analyze()
+
+    def test_no_problems(self):
+        a = _artifact("a")
+        b = _artifact("b", requires_modules=["a"])
+
+        analyzer, warnings = self.__analyze([(a, ["p.a"]), (b, ["p.b"])])
+
+        self.assertEqual([], warnings)
+        self.assertIsNone(analyzer.get_problems(a))
+        self.assertIsNone(analyzer.get_problems(b))
+
+    def test_own_package_in_required_module(self):
+        a = _artifact("a")
+        b = _artifact("b", requires_modules=["a"])
+
+        analyzer, warnings = self.__analyze([(a, ["p", "p.a"]), (b, ["p", "p.b"])])
+
+        self.assertEqual(["Split package 'p' found in: 'a.jar' (a), 'b.jar' (b)"], warnings)
+        self.assertIsNone(analyzer.get_problems(a))
+        self.assertEqual(["Package 'p' exists in required module 'a'"], analyzer.get_problems(b))
+
+    def test_package_read_from_two_required_modules(self):
+        a = _artifact("a")
+        b = _artifact("b")
+        c = _artifact("c", requires_modules=["b", "a"])
+
+        analyzer, warnings = self.__analyze([(a, ["p"]), (b, ["p"]), (c, ["p.c"])])
+
+        self.assertEqual(["Split package 'p' found in: 'a.jar' (a), 'b.jar' (b)"], warnings)
+        self.assertIsNone(analyzer.get_problems(a))
+        self.assertIsNone(analyzer.get_problems(b))
+        self.assertEqual(["Package 'p' is read from required modules 'a', 'b'"], analyzer.get_problems(c))
+
+    def test_split_package_not_exported_is_not_read(self):
+        # 'a' no exporta 'p', por lo que 'c' solo lo lee de 'b'
+        a = _artifact("a", exports_packages=["p.a"])
+        b = _artifact("b")
+        c = _artifact("c", requires_modules=["a", "b"])
+
+        analyzer, warnings = self.__analyze([(a, ["p", "p.a"]), (b, ["p"]), (c, ["p.c"])])
+
+        self.assertEqual(["Split package 'p' found in: 'a.jar' (a), 'b.jar' (b)"], warnings)
+        self.assertIsNone(analyzer.get_problems(c))
+
+    def test_split_package_between_unrelated_modules(self):
+        a = _artifact("a")
+        b = _artifact("b")
+
+        analyzer, warnings = self.__analyze([(a, ["p"]), (b, ["p"])])
+
+        self.assertEqual(["Split package 'p' found in: 'a.jar' (a), 'b.jar' (b)"], warnings)
+        self.assertIsNone(analyzer.get_problems(a))
+        self.assertIsNone(analyzer.get_problems(b))
+
+    def test_missing_exported_package(self):
+        a = _artifact("a", exports_packages=["p.a", "p.missing"])
+
+        analyzer, warnings = self.__analyze([(a, ["p.a"])])
+
+        self.assertEqual([], warnings)
+        self.assertEqual(["Exported package 'p.missing' is empty or does not exist"], analyzer.get_problems(a))
+
+    def test_automatic_modules_are_exempt(self):
+        # Los módulos automáticos exportan todos sus paquetes (se ignora 'exportsPackages') y no leen ningún módulo de
+        # forma explícita
+        a = _artifact("a")
+        b = _artifact("b", exports_packages=["p.missing"], requires_modules=["a"], automatic=True)
+
+        analyzer, warnings = self.__analyze([(a, ["p"]), (b, ["p", "p.b"])])
+
+        self.assertEqual(["Split package 'p' found in: 'a.jar' (a), 'b.jar' (b)"], warnings)
+        self.assertIsNone(analyzer.get_problems(a))
+        self.assertIsNone(analyzer.get_problems(b))
+
+    def test_automatic_module_exports_all_packages(self):
+        a = _artifact("a", exports_packages=["p.a"], automatic=True)
+        b = _artifact("b", requires_modules=["a"])
+
+        analyzer, warnings = self.__analyze([(a, ["p", "p.a"]), (b, ["p"])])
+
+        self.assertEqual(["Package 'p' exists in required module 'a'"], analyzer.get_problems(b))
+
+    def test_cyclic_dependence(self):
+        a = _artifact("a", requires_modules=["b"])
+        b = _artifact("b", requires_modules=["a"])
+
+        analyzer, warnings = self.__analyze([(a, ["p.a"]), (b, ["p.b"])])
+
+        self.assertEqual(["Cyclic module dependence: a -> b -> a"], analyzer.get_problems(a))
+        self.assertEqual(["Cyclic module dependence: b -> a -> b"], analyzer.get_problems(b))
+
+    def test_notes_are_reported_as_warnings(self):
+        a = _artifact("a")
+        analyzer = PreflightAnalyzer()
+        analyzer.add_artifact(a, {"p.a"}, ["Some note"], ["Some problem"])
+
+        self.assertEqual(["'a.jar': Some note"], analyzer.analyze())
+        self.assertEqual(["Some problem"], analyzer.get_problems(a))
+
+
+class IndexPackagesTest(unittest.TestCase):
+
+    def __index(self, *names):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as jar_file:
+            for name in names:
+                jar_file.writestr(name, b"")
+
+        with zipfile.ZipFile(buffer) as jar_file:
+            return PreflightAnalyzer.index_packages(jar_file)
+
+    def test_packages(self):
+        packages, notes, problems = self.__index("META-INF/MANIFEST.MF", "a/", "a/b/", "a/b/C.class",
+                                                 "a/b/c/D.class", "a/res.properties", "e/F.txt")
+
+        self.assertEqual({"a.b", "a.b.c"}, packages)
+        self.assertEqual([], notes)
+        self.assertEqual([], problems)
+
+    def test_versioned_entries_belong_to_base_package(self):
+        packages, notes, problems = self.__index("a/C.class", "META-INF/versions/9/a/C.class",
+                                                 "META-INF/versions/11/a/D.class")
+
+        self.assertEqual({"a"}, packages)
+        self.assertEqual([], notes)
+        self.assertEqual([], problems)
+
+    def test_versioned_only_package(self):
+        packages, notes, problems = self.__index("a/C.class", "META-INF/versions/11/b/C.class",
+                                                 "META-INF/versions/9/b/D.class")
+
+        self.assertEqual({"a"}, packages)
+        self.assertEqual(["Package 'b' only exists in META-INF/versions/{9, 11} and will not be exported"], notes)
+        self.assertEqual([], problems)
+
+    def test_other_meta_inf_classes_are_ignored(self):
+        packages, notes, problems = self.__index("a/C.class", "META-INF/C.class", "META-INF/x/C.class",
+                                                 "META-INF/versions/C.class")
+
+        self.assertEqual({"a"}, packages)
+        self.assertEqual([], notes)
+        self.assertEqual([], problems)
+
+    def test_web_inf_classes(self):
+        packages, notes, problems = self.__index("WEB-INF/classes/a/C.class", "WEB-INF/classes/a/D.class")
+
+        self.assertEqual(set(), packages)
+        self.assertEqual(["Class files in 'WEB-INF/classes/a' are not in a valid package and will not be exported"],
+                         notes)
+        self.assertEqual([], problems)
+
+    def test_versioned_module_descriptor(self):
+        packages, notes, problems = self.__index("a/C.class", "META-INF/versions/9/module-info.class")
+
+        self.assertEqual({"a"}, packages)
+        self.assertEqual([], notes)
+        self.assertEqual([], problems)
+
+    def test_classes_in_unnamed_package(self):
+        packages, notes, problems = self.__index("a/C.class", "C.class", "D.class",
+                                                 "META-INF/versions/9/E.class")
+
+        self.assertEqual({"a"}, packages)
+        self.assertEqual([], notes)
+        self.assertEqual(["3 class file(s) in the unnamed package (JAR root) are not allowed in a module"], problems)
+
+    def test_invalid_identifiers(self):
+        packages, notes, problems = self.__index("a$b/c$/C.class", "$a/C.class", "a/int/C.class", "a/1b/C.class",
+                                                 "a/b-c/C.class", "a/_/C.class", "a/_b/C.class")
+
+        self.assertEqual({"a$b.c$", "$a", "a._b"}, packages)
+        self.assertEqual(["Class files in 'a/1b' are not in a valid package and will not be exported",
+                          "Class files in 'a/_' are not in a valid package and will not be exported",
+                          "Class files in 'a/b-c' are not in a valid package and will not be exported",
+                          "Class files in 'a/int' are not in a valid package and will not be exported"], notes)
+        self.assertEqual([], problems)
+
+    def test_is_valid_package_name(self):
+        self.assertTrue(PreflightAnalyzer.is_valid_package_name("com.example"))
+        self.assertTrue(PreflightAnalyzer.is_valid_package_name("com.example$1"))
+        self.assertFalse(PreflightAnalyzer.is_valid_package_name("com.class"))
+        self.assertFalse(PreflightAnalyzer.is_valid_package_name("com..example"))
+        self.assertFalse(PreflightAnalyzer.is_valid_package_name("9com"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+import contextlib
+import io
+import threading
+import time
+import unittest
+
+from internal.cache import HttpCacheBackend
+from internal.cache import MemoryCacheBackend
+from internal.cache import ModuleCache
+
+
+class _CacheServer:
+    """
+    Servidor HTTP de caché en memoria (GET/PUT <url>/<llave>) que se ejecuta en un hilo. Si 'delay' es mayor que cero
+    cada respuesta se demora esa cantidad de segundos.
+    """
+
+    def __init__(self, delay=0):
+        entries = {}
+        self.entries = entries
+        self.requests = []
+        requests = self.requests
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                requests.append(("GET", self.path))
+                time.sleep(delay)
+                data = entries.get(self.path)
+                if data is None:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_PUT(self):
+                requests.append(("PUT", self.path))
+                entries[self.path] = self.rfile.read(int(self.headers["Content-Length"]))
+                time.sleep(delay)
+                self.send_response(201)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.__server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+
+    def get_url(self):
+        return "http://127.0.0.1:" + str(self.__server.server_address[1]) + "/cache"
+
+    def __enter__(self):
+        self.__thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+
+class HttpCacheBackendTest(unittest.TestCase):
+
+    def test_put_and_get(self):
+        with _CacheServer() as server:
+            backend = HttpCacheBackend(server.get_url() + "/", 5)
+            backend.put("abc", b"module-info")
+
+            self.assertEqual(b"module-info", backend.get("abc"))
+            self.assertEqual({"/cache/abc": b"module-info"}, server.entries)
+
+    def test_missing_entry(self):
+        with _CacheServer() as server:
+            self.assertIsNone(HttpCacheBackend(server.get_url(), 5).get("missing"))
+
+    def test_timeout(self):
+        with _CacheServer(delay=1) as server:
+            with self.assertRaises(Exception):
+                HttpCacheBackend(server.get_url(), 0.2).get("abc")
+
+
+class ModuleCacheTest(unittest.TestCase):
+
+    def test_remote_hit_is_stored_locally(self):
+        with _CacheServer() as server:
+            server.entries["/cache/abc"] = b"module-info"
+            local_backend = MemoryCacheBackend()
+            cache = ModuleCache(local_backend, HttpCacheBackend(server.get_url(), 5))
+
+            self.assertEqual(b"module-info", cache.get("abc"))
+            self.assertEqual(b"module-info", local_backend.get("abc"))
+            self.assertEqual(1, cache.get_count_hits())
+
+    def test_put_writes_both_backends(self):
+        with _CacheServer() as server:
+            local_backend = MemoryCacheBackend()
+            cache = ModuleCache(local_backend, HttpCacheBackend(server.get_url(), 5))
+            cache.put("abc", b"module-info")
+
+            self.assertEqual(b"module-info", local_backend.get("abc"))
+            self.assertEqual(b"module-info", server.entries["/cache/abc"])
+
+    def test_remote_timeout_falls_back_to_local(self):
+        with _CacheServer(delay=1) as server:
+            local_backend = MemoryCacheBackend()
+            cache = ModuleCache(local_backend, HttpCacheBackend(server.get_url(), 0.2))
+
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertIsNone(cache.get("abc"))
+                cache.put("abc", b"module-info")
+                self.assertEqual(b"module-info", cache.get("abc"))
+
+            # El servidor remoto solo se consulta una vez, luego queda deshabilitado
+            self.assertEqual([("GET", "/cache/abc")], server.requests)
+            self.assertIn("[WARN] Remote cache '" + server.get_url() + "' is not available", output.getvalue())
+            self.assertEqual(1, cache.get_count_hits())
+            self.assertEqual(1, cache.get_count_misses())
+
+    def test_key_lock(self):
+        cache = ModuleCache(MemoryCacheBackend())
+
+        self.assertIs(cache.get_key_lock("abc"), cache.get_key_lock("abc"))
+        self.assertIsNot(cache.get_key_lock("abc"), cache.get_key_lock("def"))
+
+
+if __name__ == "__main__":
+    unittest.main()
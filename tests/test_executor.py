@@ -0,0 +1,147 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import contextlib
+import io
+import random
+import threading
+import time
+import unittest
+
+from internal.executor import ParallelExecutor
+
+
+class _Recorder:
+    """
+    Registra el orden en que inician y terminan las tareas y la máxima cantidad de tareas simultáneas.
+    """
+
+    def __init__(self):
+        self.started = []
+        self.finished = []
+        self.max_running = 0
+        self.__running = 0
+        self.__lock = threading.Lock()
+
+    def task(self, name, duration=0.01):
+        def run():
+            with self.__lock:
+                self.started.append(name)
+                self.__running += 1
+                self.max_running = max(self.max_running, self.__running)
+
+            time.sleep(duration)
+
+            with self.__lock:
+                self.__running -= 1
+                self.finished.append(name)
+
+        return run
+
+
+class ParallelExecutorTest(unittest.TestCase):
+
+    def test_dependencies_finish_before_dependents(self):
+        recorder = _Recorder()
+        rnd = random.Random(1)
+
+        # Cada tarea depende de hasta tres tareas anteriores elegidas al azar
+        dependencies = [sorted(rnd.sample(range(i), min(i, rnd.randint(0, 3)))) for i in range(60)]
+        tasks = [(recorder.task(i, rnd.random() / 100), dependencies[i], (0, 0), None) for i in range(60)]
+
+        ParallelExecutor(8, None).run(tasks)
+
+        self.assertEqual(60, len(recorder.finished))
+        for i, task_dependencies in enumerate(dependencies):
+            for d in task_dependencies:
+                self.assertLess(recorder.finished.index(d), recorder.started.index(i))
+
+    def test_workers_limit(self):
+        recorder = _Recorder()
+
+        ParallelExecutor(3, None).run([(recorder.task(i, 0.05), [], (0, 0), None) for i in range(9)])
+
+        self.assertEqual(3, recorder.max_running)
+
+    def test_disk_budget(self):
+        recorder = _Recorder()
+
+        # Solo el espacio temporal se libera al terminar cada tarea: con 10 tareas de 20 + 10 bytes en un presupuesto
+        # de 100 bytes caben tres a la vez al principio y al final solo una
+        ParallelExecutor(4, 100).run([(recorder.task(i, 0.02), [], (20, 10), None) for i in range(10)])
+
+        self.assertEqual(10, len(recorder.finished))
+        self.assertEqual(3, recorder.max_running)
+
+    def test_task_larger_than_budget_runs_alone(self):
+        recorder = _Recorder()
+
+        ParallelExecutor(4, 100).run([(recorder.task(i), [], (500, 0), None) for i in range(3)])
+
+        self.assertEqual(3, len(recorder.finished))
+        self.assertEqual(1, recorder.max_running)
+
+    def test_ready_condition(self):
+        recorder = _Recorder()
+        event = threading.Event()
+        threading.Timer(0.2, event.set).start()
+
+        # La tarea 0 espera por una condición externa; las demás no deben esperar por ella
+        ParallelExecutor(1, None).run([(recorder.task(0), [], (0, 0), event.is_set),
+                                       (recorder.task(1), [], (0, 0), None),
+                                       (recorder.task(2), [0], (0, 0), None)])
+
+        self.assertEqual([1, 0, 2], recorder.finished)
+
+    def test_exception_is_raised_after_all_tasks_finish(self):
+        recorder = _Recorder()
+
+        def fail():
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            ParallelExecutor(2, None).run([(fail, [], (0, 0), None), (recorder.task(1, 0.05), [], (0, 0), None),
+                                           (recorder.task(2), [0], (0, 0), None)])
+
+        self.assertEqual([1, 2], sorted(recorder.finished))
+
+    def test_output_of_each_task_is_not_mixed(self):
+        def task(name):
+            def run():
+                for i in range(20):
+                    print(name + str(i))
+                    time.sleep(0.001)
+            return run
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            ParallelExecutor(4, None).run([(task(n), [], (0, 0), None) for n in "abcd"])
+
+        lines = output.getvalue().splitlines()
+        for n in "abcd":
+            start = lines.index(n + "0")
+            self.assertEqual([n + str(i) for i in range(20)], lines[start:start + 20])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,269 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from unittest import mock
+import io
+import unittest
+import zipfile
+
+from internal.jar import JarPatcher
+
+
+def _build_jar(entries, compress_type=zipfile.ZIP_DEFLATED):
+    """
+    :param entries: Lista de tuplas (nombre o ZipInfo, contenido) con las entradas del JAR.
+    :return: Contenido del JAR.
+    """
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", compress_type) as jar_file:
+        for name, data in entries:
+            jar_file.writestr(name, data)
+
+    return output.getvalue()
+
+
+class _UnseekableStream(io.RawIOBase):
+    """
+    Flujo de escritura sin posicionamiento. ZipFile escribe en él las entradas con descriptor de datos (bit 3), ya que
+    no puede volver atrás para completar el encabezado local.
+    """
+
+    def __init__(self):
+        self.output = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.output.write(data)
+
+
+def _read_raw_entries(data):
+    """
+    :return: Diccionario nombre->bytes de la entrada tal cual aparecen en el JAR (encabezado local, datos comprimidos y
+             descriptor de datos).
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as jar_file:
+        infos = sorted(jar_file.infolist(), key=lambda i: i.header_offset)
+        ends = [i.header_offset for i in infos[1:]] + [jar_file.start_dir]
+        return {i.filename: data[i.header_offset:end] for i, end in zip(infos, ends)}
+
+
+def _read_entries(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as jar_file:
+        return {info.filename: jar_file.read(info) for info in jar_file.infolist()}
+
+
+class ReproducibleJarTest(unittest.TestCase):
+
+    def __build_source_jars(self):
+        """
+        :return: Dos JARs con las mismas entradas, pero en distinto orden, con distintas fechas, permisos y compresión.
+        """
+        names = ["META-INF/MANIFEST.MF", "p/", "p/A.class", "p/B.class", "res/data.txt"]
+        contents = [b"Manifest-Version: 1.0\r\n\r\n", b"", b"class A" * 50, b"class B" * 50, b"data"]
+
+        jars = []
+        for date_time, external_attr, compress_type, order in [((2001, 2, 3, 4, 5, 6), 0o100600 << 16,
+                                                                 zipfile.ZIP_STORED, [0, 1, 2, 3, 4]),
+                                                                ((2022, 11, 12, 13, 14, 16), 0o100777 << 16,
+                                                                 zipfile.ZIP_DEFLATED, [4, 3, 2, 1, 0])]:
+            entries = []
+            for i in order:
+                info = zipfile.ZipInfo(names[i], date_time)
+                info.external_attr = external_attr
+                info.compress_type = compress_type
+                entries.append((info, contents[i]))
+            jars.append(_build_jar(entries))
+
+        self.assertNotEqual(jars[0], jars[1])
+        return jars
+
+    def test_module_descriptor_output_is_identical(self):
+        outputs = []
+        for source in self.__build_source_jars():
+            target = io.BytesIO()
+            JarPatcher.add_module_descriptor(source, target, b"module-info", True)
+            outputs.append(target.getvalue())
+
+        self.assertEqual(outputs[0], outputs[1])
+        with zipfile.ZipFile(io.BytesIO(outputs[0])) as jar_file:
+            self.assertEqual(["META-INF/MANIFEST.MF", "module-info.class", "p/", "p/A.class", "p/B.class",
+                              "res/data.txt"], jar_file.namelist())
+            self.assertEqual({(1980, 1, 1, 0, 0, 0)}, {i.date_time for i in jar_file.infolist()})
+
+    def test_automatic_module_output_is_identical(self):
+        outputs = []
+        for source in self.__build_source_jars():
+            target = io.BytesIO()
+            JarPatcher.add_automatic_module_name(source, target, "com.example", True)
+            outputs.append(target.getvalue())
+
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_source_date_epoch(self):
+        source = self.__build_source_jars()[0]
+        target = io.BytesIO()
+        with mock.patch.dict("os.environ", {"SOURCE_DATE_EPOCH": "1700000000"}):
+            JarPatcher.add_module_descriptor(source, target, b"module-info", True)
+
+        with zipfile.ZipFile(target) as jar_file:
+            self.assertEqual({(2023, 11, 14, 22, 13, 20)}, {i.date_time for i in jar_file.infolist()})
+
+    def test_zip64_entry(self):
+        content = bytes(range(256)) * 16
+        source = _build_jar([("META-INF/MANIFEST.MF", "Manifest-Version: 1.0\r\n\r\n"), ("p/Big.class", content)])
+        target = io.BytesIO()
+
+        # Cualquier entrada mayor que ZIP64_LIMIT debe escribirse con extensiones ZIP64
+        with mock.patch.object(zipfile, "ZIP64_LIMIT", 1024):
+            JarPatcher.add_module_descriptor(source, target, b"module-info", True)
+
+        entries = _read_entries(target.getvalue())
+        self.assertEqual(content, entries["p/Big.class"])
+        self.assertEqual(b"module-info", entries["module-info.class"])
+
+
+class AutomaticModuleNameTest(unittest.TestCase):
+    """
+    Sin normalizar las entradas, las que no cambian se copian tal cual desde el JAR original (ver JarPatcher.__rewrite).
+    """
+
+    def __add_automatic_module_name(self, source, module_name="com.example"):
+        target = io.BytesIO()
+        JarPatcher.add_automatic_module_name(source, target, module_name)
+        return target.getvalue()
+
+    def __assert_copied_raw(self, source, target, names):
+        source_entries = _read_raw_entries(source)
+        target_entries = _read_raw_entries(target)
+        for name in names:
+            self.assertEqual(source_entries[name], target_entries[name], name)
+
+    def __read_manifest(self, data):
+        return _read_entries(data)["META-INF/MANIFEST.MF"].decode("utf-8")
+
+    def test_entries_with_data_descriptor(self):
+        stream = _UnseekableStream()
+        with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as jar_file:
+            jar_file.writestr("META-INF/MANIFEST.MF", "Manifest-Version: 1.0\r\n\r\n")
+            with jar_file.open("p/A.class", "w") as entry:
+                entry.write(b"class A" * 100)
+            with jar_file.open("p/B.class", "w") as entry:
+                entry.write(b"class B" * 100)
+        source = stream.output.getvalue()
+
+        target = self.__add_automatic_module_name(source)
+
+        with zipfile.ZipFile(io.BytesIO(target)) as jar_file:
+            self.assertTrue(jar_file.getinfo("p/A.class").flag_bits & 0x08)
+            self.assertIsNone(jar_file.testzip())
+        self.__assert_copied_raw(source, target, ["p/A.class", "p/B.class"])
+
+    def test_mixed_stored_and_deflated_entries(self):
+        stored = zipfile.ZipInfo("p/Stored.class", (2020, 1, 1, 0, 0, 0))
+        stored.compress_type = zipfile.ZIP_STORED
+        deflated = zipfile.ZipInfo("p/Deflated.class", (2020, 1, 1, 0, 0, 0))
+        deflated.compress_type = zipfile.ZIP_DEFLATED
+        source = _build_jar([("META-INF/MANIFEST.MF", "Manifest-Version: 1.0\r\n\r\n"), ("p/", ""),
+                             (stored, b"stored" * 100), (deflated, b"deflated" * 100)])
+
+        target = self.__add_automatic_module_name(source)
+
+        entries = _read_entries(target)
+        self.assertEqual(b"stored" * 100, entries["p/Stored.class"])
+        self.assertEqual(b"deflated" * 100, entries["p/Deflated.class"])
+        with zipfile.ZipFile(io.BytesIO(target)) as jar_file:
+            self.assertEqual(zipfile.ZIP_STORED, jar_file.getinfo("p/Stored.class").compress_type)
+            self.assertEqual(zipfile.ZIP_DEFLATED, jar_file.getinfo("p/Deflated.class").compress_type)
+        self.__assert_copied_raw(source, target, ["p/", "p/Stored.class", "p/Deflated.class"])
+
+    def test_manifest_with_entry_sections(self):
+        manifest = ("Manifest-Version: 1.0\r\n"
+                    "Class-Path: lib/first-library-with-a-very-long-name-1.0.0.jar lib/second-lib\r\n"
+                    " rary-2.0.0.jar\r\n"
+                    "\r\n"
+                    "Name: p/A.class\r\n"
+                    "Automatic-Module-Name: not.in.main.section\r\n"
+                    "\r\n")
+        source = _build_jar([("META-INF/MANIFEST.MF", manifest), ("p/A.class", b"class A")])
+
+        self.assertEqual("Manifest-Version: 1.0\r\n"
+                         "Class-Path: lib/first-library-with-a-very-long-name-1.0.0.jar lib/second-lib\r\n"
+                         " rary-2.0.0.jar\r\n"
+                         "Automatic-Module-Name: com.example\r\n"
+                         "\r\n"
+                         "Name: p/A.class\r\n"
+                         "Automatic-Module-Name: not.in.main.section\r\n"
+                         "\r\n", self.__read_manifest(self.__add_automatic_module_name(source)))
+
+    def test_existing_automatic_module_name_is_replaced(self):
+        manifest = ("Manifest-Version: 1.0\n"
+                    "Automatic-Module-Name: com.example.a.very.long.module.name.that.does.not.fit.in\n"
+                    " .one.line\n"
+                    "Created-By: test\n")
+        source = _build_jar([("META-INF/MANIFEST.MF", manifest), ("p/A.class", b"class A")])
+
+        self.assertEqual("Manifest-Version: 1.0\n"
+                         "Created-By: test\n"
+                         "Automatic-Module-Name: com.example\n"
+                         "\n", self.__read_manifest(self.__add_automatic_module_name(source)))
+
+    def test_jar_without_manifest(self):
+        source = _build_jar([("p/A.class", b"class A")])
+
+        target = self.__add_automatic_module_name(source)
+
+        self.assertEqual("Manifest-Version: 1.0\r\nAutomatic-Module-Name: com.example\r\n\r\n",
+                         self.__read_manifest(target))
+        self.__assert_copied_raw(source, target, ["p/A.class"])
+
+    def test_prefixed_jar(self):
+        prefix = b"#!/bin/sh\nexec java -jar \"$0\" \"$@\"\n"
+        jar = _build_jar([("META-INF/MANIFEST.MF", "Manifest-Version: 1.0\r\n\r\n"), ("p/A.class", b"class A")])
+        source = prefix + jar
+
+        target = self.__add_automatic_module_name(source)
+
+        self.assertTrue(target.startswith(prefix))
+        with zipfile.ZipFile(io.BytesIO(target)) as jar_file:
+            self.assertIsNone(jar_file.testzip())
+            self.assertEqual(b"class A", jar_file.read("p/A.class"))
+        self.__assert_copied_raw(source, target, ["p/A.class"])
+
+    def test_long_names(self):
+        entry_name = "com/example/" + "very_long_package_name/" * 5 + "AClassWithAVeryLongNameIndeed.class"
+        module_name = "com.example." + "very.long.module.name." * 4 + "end"
+        source = _build_jar([("META-INF/MANIFEST.MF", "Manifest-Version: 1.0\r\n\r\n"), (entry_name, b"class")])
+
+        target = self.__add_automatic_module_name(source, module_name)
+
+        manifest = self.__read_manifest(target)
+        lines = manifest.split("\r\n")
+        self.assertTrue(all(len(line.encode("utf-8")) <= 72 for line in lines))
+        self.assertIn("Automatic-Module-Name: " + module_name, manifest.replace("\r\n ", ""))
+        self.__assert_copied_raw(source, target, [entry_name])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import unittest
+
+from internal.entity import Artifact
+from internal.entity import Module
+from internal.planner import DependencyPlanner
+
+
+def _artifact(name, *requires_modules):
+    return Artifact(name + ".jar", Module(name, requiresModules=list(requires_modules)))
+
+
+class FindCyclesTest(unittest.TestCase):
+
+    def test_no_cycles(self):
+        artifacts = [_artifact("a"), _artifact("b", "a", "java.sql"), _artifact("c", "a", "b")]
+        self.assertEqual({}, DependencyPlanner.find_cycles(artifacts))
+
+    def test_two_module_cycle(self):
+        artifacts = [_artifact("a", "b"), _artifact("b", "a"), _artifact("c", "a")]
+
+        cycles = DependencyPlanner.find_cycles(artifacts)
+
+        # 'c' depende del ciclo pero no forma parte de él
+        self.assertEqual({"a.jar": ["a", "b", "a"], "b.jar": ["b", "a", "b"]}, cycles)
+
+    def test_self_dependence(self):
+        self.assertEqual({"a.jar": ["a", "a"]}, DependencyPlanner.find_cycles([_artifact("a", "a")]))
+
+    def test_shortest_cycle_is_reported(self):
+        # a -> b -> c -> a y a -> c -> a
+        artifacts = [_artifact("a", "b", "c"), _artifact("b", "c"), _artifact("c", "a")]
+
+        cycles = DependencyPlanner.find_cycles(artifacts)
+
+        self.assertEqual(["a", "c", "a"], cycles["a.jar"])
+        self.assertEqual(["b", "c", "a", "b"], cycles["b.jar"])
+        self.assertEqual(["c", "a", "c"], cycles["c.jar"])
+
+    def test_independent_cycles(self):
+        artifacts = [_artifact("a", "b"), _artifact("b", "a"), _artifact("x", "y"), _artifact("y", "z"),
+                     _artifact("z", "x"), _artifact("free")]
+
+        cycles = DependencyPlanner.find_cycles(artifacts)
+
+        self.assertEqual({"a.jar", "b.jar", "x.jar", "y.jar", "z.jar"}, set(cycles))
+        self.assertEqual(["x", "y", "z", "x"], cycles["x.jar"])
+
+    def test_long_chain(self):
+        # El algoritmo no debe depender de la profundidad de recursión de Python
+        artifacts = [_artifact("m0", "m1999")] + [_artifact("m" + str(i), "m" + str(i - 1)) for i in range(1, 2000)]
+
+        cycles = DependencyPlanner.find_cycles(artifacts)
+
+        self.assertEqual(2000, len(cycles))
+        self.assertEqual(2001, len(cycles["m0.jar"]))
+
+
+class SortTest(unittest.TestCase):
+
+    def test_dependencies_come_first(self):
+        artifacts = [_artifact("top", "m0", "m1"), _artifact("m0", "base"), _artifact("m1", "base", "java.sql"),
+                     _artifact("base")]
+
+        artifact_list, levels = DependencyPlanner.sort(set(artifacts))
+
+        names = [a.get_name() for a in artifact_list]
+        self.assertEqual("base.jar", names[0])
+        self.assertEqual("top.jar", names[-1])
+        self.assertEqual({"base.jar": 0, "m0.jar": 1, "m1.jar": 1, "top.jar": 2}, levels)
+
+    def test_levels_do_not_depend_on_order(self):
+        # Los niveles se utilizan para repartir los artefactos entre fragmentos, por lo que deben ser los mismos en
+        # todas las máquinas
+        artifacts = [_artifact("base")] + [_artifact("m" + str(i), "base") for i in range(8)] + \
+                    [_artifact("top", "m0", "m1", "m2", "m3"), _artifact("a", "b", "base"), _artifact("b", "a")]
+        expected = {"base.jar": 0, "top.jar": 2, "a.jar": 1, "b.jar": 0}
+        expected.update({"m" + str(i) + ".jar": 1 for i in range(8)})
+
+        for i in range(len(artifacts)):
+            self.assertEqual(expected, DependencyPlanner.sort(artifacts[i:] + artifacts[:i])[1])
+            self.assertEqual(expected, DependencyPlanner.sort(list(reversed(artifacts[i:] + artifacts[:i])))[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,231 @@
+# MIT License
+#
+# Copyright (c) 2019 Eduardo E. Betanzos Morales
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from pathlib import Path
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+
+from internal.entity import Artifact
+from internal.entity import Module
+from internal.shard import ShardPartitioner
+from internal.shard import ShardReport
+
+JARMOD = Path(__file__).resolve().parent.parent / "jarmod.py"
+
+# javac de prueba: "compila" el descriptor copiándolo como module-info.class y falla, igual que javac, si alguno de los
+# módulos requeridos no está en el --module-path
+FAKE_JAVAC = """#!{python}
+import glob, os, re, sys, zipfile
+args = sys.argv[1:]
+source = open(args[-1]).read()
+available = set()
+module_path = args[args.index("--module-path") + 1] if "--module-path" in args else ""
+for entry in module_path.split(os.pathsep):
+    for jar in glob.glob(os.path.join(entry, "*.jar")) if os.path.isdir(entry) else [entry]:
+        with zipfile.ZipFile(jar) as jar_file:
+            if "module-info.class" in jar_file.namelist():
+                available.add(re.search(r"module\\s+([\\w.]+)", jar_file.read("module-info.class").decode()).group(1))
+missing = [m for m in re.findall(r"requires\\s+([\\w.]+);", source) if m not in available]
+if missing:
+    sys.stderr.write("module not found: " + ", ".join(missing))
+    sys.exit(1)
+open(os.path.join(args[args.index("-d") + 1], "module-info.class"), "w").write(source)
+"""
+
+
+def _artifact(name, *requires_modules):
+    return Artifact(name + ".jar", Module(name, ["p." + name], list(requires_modules)))
+
+
+class ShardPartitionerTest(unittest.TestCase):
+
+    def test_parse_shard(self):
+        self.assertEqual((2, 3), ShardPartitioner.parse_shard("2/3"))
+        for shard in ["0/3", "4/3", "3", "a/b"]:
+            with self.assertRaises(ValueError):
+                ShardPartitioner.parse_shard(shard)
+
+    def test_every_level_is_spread_across_shards(self):
+        # Todos los artefactos dependen de un único módulo base, como en un descriptor real
+        artifacts = [_artifact("base")] + [_artifact("m" + str(i), "base") for i in range(9)]
+        weights = {a.get_name(): 10 for a in artifacts}
+        levels = {a.get_name(): 0 if a.get_name() == "base.jar" else 1 for a in artifacts}
+
+        shards = ShardPartitioner.partition(artifacts, weights, levels, 3)
+
+        self.assertEqual(sorted(a.get_name() for a in artifacts), sorted(a.get_name() for s in shards for a in s))
+        self.assertEqual([4, 3, 3], [len(s) for s in shards])
+        for shard in shards:
+            self.assertEqual(shard, [a for a in artifacts if a in shard])
+
+    def test_balanced_by_weight(self):
+        artifacts = [_artifact(n) for n in "abcdef"]
+        weights = {"a.jar": 60, "b.jar": 50, "c.jar": 40, "d.jar": 30, "e.jar": 20, "f.jar": 10}
+
+        shards = ShardPartitioner.partition(artifacts, weights, {}, 2)
+
+        self.assertEqual([[a.get_name() for a in s] for s in shards],
+                         [["a.jar", "d.jar", "e.jar"], ["b.jar", "c.jar", "f.jar"]])
+
+    def test_partition_is_deterministic(self):
+        artifacts = [_artifact("m" + str(i)) for i in range(20)]
+        weights = {a.get_name(): 7 for a in artifacts}
+
+        # Todas las máquinas deben obtener la misma partición, sin importar el orden de los artefactos
+        shards = ShardPartitioner.partition(artifacts, weights, {}, 4)
+        reversed_shards = ShardPartitioner.partition(list(reversed(artifacts)), weights, {}, 4)
+
+        self.assertEqual([set(s) for s in shards], [set(s) for s in reversed_shards])
+        self.assertEqual([5, 5, 5, 5], [len(s) for s in shards])
+
+
+class ShardedExecutionTest(unittest.TestCase):
+    """
+    Modulariza un descriptor en varios fragmentos ejecutados como procesos independientes, que comparten el directorio
+    de destino, y verifica el resultado con --merge-shards.
+    """
+
+    SHARDS = 3
+
+    def setUp(self):
+        self.__temp_dir = tempfile.TemporaryDirectory(prefix="jarmod-test-")
+        self.__root = Path(self.__temp_dir.name)
+
+        jdk_bin = self.__root / "jdk" / "bin"
+        jdk_bin.mkdir(parents=True)
+        javac_file = jdk_bin / ("javac.exe" if os.name == "nt" else "javac")
+        javac_file.write_text(FAKE_JAVAC.format(python=sys.executable))
+        javac_file.chmod(0o755)
+
+        self.__source_dir = self.__root / "source"
+        self.__source_dir.mkdir()
+        self.__destination_dir = self.__root / "dest"
+
+    def tearDown(self):
+        self.__temp_dir.cleanup()
+
+    def __write_descriptor(self, artifacts):
+        # Cada JAR contiene el paquete p.<módulo>
+        for artifact in artifacts:
+            with zipfile.ZipFile(str(self.__source_dir / artifact.get_name()), "w") as jar_file:
+                jar_file.writestr("p/" + artifact.get_module().get_name() + "/A.class", b"\xca\xfe\xba\xbe")
+
+        descriptor_file = self.__root / "descriptor.json"
+        descriptor_file.write_text(json.dumps([a.to_json() for a in artifacts]))
+        return descriptor_file
+
+    def __run_jarmod(self, descriptor_file, *options):
+        command = [sys.executable, str(JARMOD), str(descriptor_file), str(self.__source_dir), "--dest",
+                   str(self.__destination_dir)] + list(options)
+        env = dict(os.environ, JAVA_HOME=str(self.__root / "jdk"))
+        return subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+    def __run_shards(self, descriptor_file, count=SHARDS, *options):
+        processes = [self.__run_jarmod(descriptor_file, "--shard", str(i) + "/" + str(count), *options)
+                     for i in range(1, count + 1)]
+        return [p.communicate(timeout=120)[0] for p in processes]
+
+    def test_shards_wait_for_upstream_modules(self):
+        # Un módulo base del que dependen todos y una cadena que cruza los fragmentos
+        artifacts = [_artifact("base")] + [_artifact("m" + str(i), "base") for i in range(8)] + \
+                    [_artifact("top", "m0", "m1", "m2", "m3")]
+        descriptor_file = self.__write_descriptor(artifacts)
+
+        outputs = self.__run_shards(descriptor_file)
+
+        for output in outputs:
+            self.assertNotIn("[ERROR]", output)
+
+        for artifact in artifacts:
+            self.assertTrue((self.__destination_dir / (artifact.get_name() + "-mod.jar")).is_file())
+
+        for index in range(1, self.SHARDS + 1):
+            report = ShardReport.load(self.__destination_dir, index, self.SHARDS)
+            self.assertTrue(report.is_finished())
+            self.assertGreater(len(report.get_artifacts()), 0)
+
+        merge = self.__run_jarmod(descriptor_file, "--merge-shards", str(self.SHARDS))
+        output = merge.communicate(timeout=120)[0]
+        self.assertEqual(0, merge.returncode, output)
+        self.assertIn(str(len(artifacts)) + " JARs modularized", output)
+
+    def test_failure_is_propagated_to_other_shards(self):
+        # El paquete exportado por el módulo base no existe, por lo que ninguno de los demás puede ser modularizado
+        artifacts = [Artifact("base.jar", Module("base", ["p.missing"]))] + \
+                    [_artifact("m" + str(i), "base") for i in range(5)]
+        descriptor_file = self.__write_descriptor(artifacts)
+
+        outputs = self.__run_shards(descriptor_file)
+
+        skipped = {line for output in outputs for line in output.splitlines()
+                   if line.startswith("[WARN] 'm") and line.endswith("skipped because of 'base.jar'")}
+        self.assertEqual(5, len(skipped))
+
+        merge = self.__run_jarmod(descriptor_file, "--merge-shards", str(self.SHARDS))
+        output = merge.communicate(timeout=120)[0]
+        self.assertIn("6 errors found", output)
+
+    def test_cycle_across_shards_is_rejected_up_front(self):
+        # Cada módulo del ciclo queda en un fragmento distinto
+        descriptor_file = self.__write_descriptor([_artifact("a", "b"), _artifact("b", "a")])
+
+        outputs = self.__run_shards(descriptor_file, 2, "--shard-timeout", "60")
+
+        for output in outputs:
+            self.assertIn("Cyclic module dependence", output)
+            self.assertNotIn("Timeout waiting", output)
+
+    def test_stale_modularized_jar_is_not_used(self):
+        # El módulo base queda en el fragmento 1 y su dependiente en el 2
+        descriptor_file = self.__write_descriptor([_artifact("base"), _artifact("m0", "base")])
+        self.__destination_dir.mkdir()
+        with zipfile.ZipFile(str(self.__destination_dir / "base.jar-mod.jar"), "w") as jar_file:
+            jar_file.writestr("module-info.class", "module base {}")
+
+        # Solo se ejecuta el fragmento 2, por lo que el módulo base nunca estará disponible
+        process = self.__run_jarmod(descriptor_file, "--shard", "2/2", "--shard-timeout", "1")
+        output = process.communicate(timeout=120)[0]
+
+        self.assertIn("[WARN] Timeout waiting for modules 'base' required by 'm0.jar' from other shards", output)
+
+    def test_merge_detects_unfinished_shard(self):
+        descriptor_file = self.__write_descriptor([_artifact("a"), _artifact("b", "a")])
+        self.__run_shards(descriptor_file)
+
+        report_file = self.__destination_dir / ".jarmod-shard-1-of-3.json"
+        data = json.loads(report_file.read_text())
+        data["finished"] = False
+        report_file.write_text(json.dumps(data))
+
+        merge = self.__run_jarmod(descriptor_file, "--merge-shards", str(self.SHARDS))
+        output = merge.communicate(timeout=120)[0]
+        self.assertIn("[ERROR] Shard 1/3 has not finished", output)
+
+
+if __name__ == "__main__":
+    unittest.main()